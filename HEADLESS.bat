@@ -0,0 +1,6 @@
+@ECHO off
+
+call .venv\Scripts\activate.bat
+python src\roi_camera_capture\headless.py %*
+
+ECHO Capture stopped.
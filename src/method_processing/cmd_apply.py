@@ -1,12 +1,14 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import cv2
 from pathlib import Path
 from logging import getLogger as lg
-import os
+import csv
 
 import click
 
-from util import import_grad_poly, import_image
+from util import import_corrector, import_grad_poly, iter_images
+from pyramid import export_pyramid
 
 plt.rcParams['figure.dpi'] = 300
 plt.rcParams['figure.figsize'] = [6, 4]
@@ -21,7 +23,15 @@ plt.rcParams['axes.grid.which'] = 'both'
 plt.rcParams["font.family"] = "serif"
 plt.rcParams["font.serif"] = ["Times New Roman"]
 
-def apply_grad_to_image(image: np.ndarray, grad_poly: np.poly1d, averaging_func = np.max, shift: int = 1) -> np.ndarray:
+def filter_image(image: np.ndarray, averaging_func = np.max, shift: int = 1) -> np.ndarray:
+    # Для максимума по окну 3x3 результат совпадает с циклом ниже, но считается сразу для всего кадра
+    if averaging_func is np.max and shift == 1:
+        dilated = cv2.dilate(image, np.ones((3, 3), np.uint8), borderType=cv2.BORDER_REPLICATE)
+        mask = wire_mask(image)
+        image_processed = np.where(mask, dilated, 0).astype(image.dtype)
+        image_processed[image_processed == 0] = dilated[mask].min() if mask.any() else 0
+        return image_processed
+
     image_processed = np.zeros_like(image)
     min_value = 0
     for i in range(1, image.shape[0] - 1):
@@ -37,7 +47,92 @@ def apply_grad_to_image(image: np.ndarray, grad_poly: np.poly1d, averaging_func
             min_value = min(min_value, value)
 
     image_processed[image_processed == 0] = min_value
-    return grad_poly(image_processed)
+    return image_processed
+
+def apply_grad_to_image(image: np.ndarray, grad_poly: np.poly1d, averaging_func = np.max, shift: int = 1) -> np.ndarray:
+    return grad_poly(filter_image(image, averaging_func, shift))
+
+def wire_mask(image: np.ndarray, shift: int = 1) -> np.ndarray:
+    """Пиксели нити, для которых apply_grad_to_image вычисляет температуру"""
+    mask = image > 0
+    mask[:shift, :] = False
+    mask[-shift:, :] = False
+    mask[:, :shift] = False
+    mask[:, -shift:] = False
+    return mask
+
+def temperature_statistics(temperature_map: np.ndarray, mask: np.ndarray,
+                           percentiles: tuple[float, ...] = (1, 5, 50, 95, 99),
+                           bins: int = 64, hist_range: tuple[float, float] | None = None) -> dict:
+    """
+    Статистика температуры по пикселям нити
+
+    Args:
+        temperature_map: Карта температуры
+        mask: Пиксели нити
+        percentiles: Вычисляемые перцентили
+        bins: Количество интервалов гистограммы
+        hist_range: Диапазон гистограммы, по умолчанию от минимума до максимума
+
+    Returns:
+        Словарь со значениями wire_pixels, min, max, mean, percentiles,
+        hot_x, hot_y, histogram и bin_edges
+    """
+    values = temperature_map[mask]
+    if values.size == 0:
+        return {
+            "wire_pixels": 0, "min": np.nan, "max": np.nan, "mean": np.nan,
+            "percentiles": np.full(len(percentiles), np.nan),
+            "hot_x": -1, "hot_y": -1,
+            "histogram": np.zeros(bins, dtype=np.int64),
+            "bin_edges": np.full(bins + 1, np.nan),
+        }
+
+    # Самая горячая точка нити
+    hot = np.argmax(np.where(mask, temperature_map, -np.inf))
+    hot_y, hot_x = np.unravel_index(hot, temperature_map.shape)
+    histogram, bin_edges = np.histogram(values, bins=bins, range=hist_range)
+
+    return {
+        "wire_pixels": values.size,
+        "min": values.min(),
+        "max": values.max(),
+        "mean": values.mean(),
+        "percentiles": np.percentile(values, percentiles),
+        "hot_x": int(hot_x),
+        "hot_y": int(hot_y),
+        "histogram": histogram,
+        "bin_edges": bin_edges,
+    }
+
+def export_statistics(path: Path, filenames: list[str], statistics: list[dict],
+                      percentiles: tuple[float, ...]) -> None:
+    """
+    Сохраняет статистику всех изображений: скалярные значения в CSV,
+    гистограммы - в npz с тем же именем
+    """
+    with open(path.with_suffix(".csv"), "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(
+            ["filename", "wire_pixels", "min", "max", "mean"]
+            + [f"p{p:g}" for p in percentiles]
+            + ["hot_x", "hot_y"]
+        )
+        for filename, stats in zip(filenames, statistics):
+            writer.writerow(
+                [filename, stats["wire_pixels"], stats["min"], stats["max"], stats["mean"]]
+                + list(stats["percentiles"])
+                + [stats["hot_x"], stats["hot_y"]]
+            )
+
+    np.savez_compressed(
+        path.with_suffix(".npz"),
+        filenames=np.array(filenames),
+        percentile_levels=np.array(percentiles),
+        percentiles=np.array([stats["percentiles"] for stats in statistics]),
+        histograms=np.array([stats["histogram"] for stats in statistics]),
+        bin_edges=np.array([stats["bin_edges"] for stats in statistics]),
+    )
 
 def export_temperature_map(path: Path, temperature_map: np.ndarray, label: str = "Температура (K)"):
     plt.clf()
@@ -47,35 +142,88 @@ def export_temperature_map(path: Path, temperature_map: np.ndarray, label: str =
     plt.savefig(path.resolve())
 
 @click.command()
-@click.option("--input-dir", default="INPUT_IMAGES", help="Каталог с изображениями для применения градуировки")
+@click.option("--input-dir", default="INPUT_IMAGES", help="Каталог с изображениями или набор, созданный командой pack")
 @click.option("--output-dir", default="OUTPUT_IMAGES", help="Каталог для сохранения результата градуировки")
+@click.option("--stats/--no-stats", default=True, help="Сохранять статистику температуры по изображениям")
+@click.option("--stats-name", default="statistics", help="Имя файлов статистики (без расширения) в каталоге результата")
+@click.option("--hist-bins", default=64, help="Количество интервалов гистограммы температуры")
+@click.option("--hist-range", nargs=2, type=float, default=None, help="Диапазон гистограммы температуры: MIN MAX")
+@click.option("--pyramid", is_flag=True, help="Сохранять карту температуры как тайловую пирамиду для просмотра")
+@click.option("--tile-size", default=256, help="Размер тайла пирамиды")
+@click.option("--grad", "grad_names", multiple=True, help="Градуировка для применения (можно указать несколько раз), по умолчанию --grad-name")
+@click.option("--diff", is_flag=True, help="Сохранять разность карт каждой градуировки с первой")
 @click.pass_context
-def apply(ctx, input_dir, output_dir):
+def apply(ctx, input_dir, output_dir, stats, stats_name, hist_bins, hist_range, pyramid, tile_size, grad_names, diff):
     cwd = Path().cwd()
-    grad_name = ctx.obj['GRAD_NAME']
+    grad_names = list(grad_names) or [ctx.obj['GRAD_NAME']]
     grad_dir = ctx.obj['GRAD_DIR']
 
-    grad_path = cwd / grad_dir / f"{grad_name}.grad"
-    click.echo(f"Using graduation {grad_name}")
+    click.echo(f"Using graduation {', '.join(grad_names)}")
     
     input_path = cwd / input_dir
     output_path = cwd / output_dir
     input_path.mkdir(exist_ok=True)
     output_path.mkdir(exist_ok=True)
 
+    # Одна градуировка - результат прямо в output_dir, несколько - в подкаталогах по имени
+    if len(grad_names) == 1:
+        grad_outputs = {grad_names[0]: output_path}
+    else:
+        grad_outputs = {name: output_path / name for name in grad_names}
+    for path in grad_outputs.values():
+        path.mkdir(exist_ok=True)
+
+    diff_outputs = {}
+    if diff:
+        diff_outputs = {name: output_path / f"diff_{name}_{grad_names[0]}" for name in grad_names[1:]}
+        for path in diff_outputs.values():
+            path.mkdir(exist_ok=True)
+
+    percentiles = (1, 5, 50, 95, 99)
+    filenames = []
+    statistics = {name: [] for name in grad_names}
+
     try:
-        for filename in os.listdir(input_path):
-            if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                continue
-                
-            grad_poly = import_grad_poly(grad_path)
-            image = import_image(input_path / filename)
-            processed = apply_grad_to_image(image, grad_poly)
+        grad_polys = {name: import_grad_poly(cwd / grad_dir / f"{name}.grad") for name in grad_names}
+        corrector = import_corrector(cwd / ctx.obj['CALIB_DIR'], ctx.obj['CALIBRATION'])
+
+        # Изображение читается и фильтруется один раз для всех градуировок
+        for filename, image, _ in iter_images(input_path, corrector=corrector):
+            filtered = filter_image(image)
+            mask = wire_mask(image) if stats else None
+            filenames.append(filename)
+
+            processed = {}
+            for name, grad_poly in grad_polys.items():
+                processed[name] = grad_poly(filtered)
+                grad_output = grad_outputs[name]
             
-            out_path = output_path / f"processed_{filename}"
-            export_temperature_map(out_path, processed)
+                out_path = grad_output / f"processed_{filename}"
+                export_temperature_map(out_path, processed[name])
+
+                if pyramid:
+                    export_pyramid(grad_output / f"pyramid_{Path(filename).stem}", processed[name], tile_size)
+
+                # Статистика по уже вычисленной карте, без повторного чтения результата
+                if stats:
+                    statistics[name].append(temperature_statistics(
+                        processed[name], mask, percentiles, hist_bins, hist_range
+                    ))
+
+            for name, diff_output in diff_outputs.items():
+                export_temperature_map(
+                    diff_output / f"diff_{filename}",
+                    processed[name] - processed[grad_names[0]],
+                    label="Разность температур (K)"
+                )
             
             click.echo(f"Processed {filename}")
+
+        if stats and filenames:
+            for name, grad_output in grad_outputs.items():
+                stats_path = grad_output / stats_name
+                export_statistics(stats_path, filenames, statistics[name], percentiles)
+                click.echo(f"Statistics saved to {stats_path.with_suffix('.csv')}")
             
     except FileNotFoundError as e:
         lg(__name__).error(f"File not found: {e}")
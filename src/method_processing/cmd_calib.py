@@ -0,0 +1,42 @@
+from pathlib import Path
+from logging import getLogger as lg
+
+import click
+
+from correction import build_master, calibration_key, export_calibration
+
+@click.command()
+@click.option("--dark-dir", default="DARK_FRAMES", help="Каталог с темновыми кадрами")
+@click.option("--flat-dir", default=None, help="Каталог с кадрами равномерной засветки")
+@click.option("--camera", default="cam0", help="Название камеры")
+@click.option("--exposure", default=0., help="Экспозиция, при которой сняты кадры")
+@click.option("--overwrite", is_flag=True, help="Разрешить перезапись калибровки")
+@click.pass_context
+def calib(ctx: click.Context, dark_dir: str, flat_dir: str | None, camera: str, exposure: float, overwrite: bool):
+    cwd = Path().cwd()
+    calib_dir = cwd / str(ctx.obj['CALIB_DIR'])
+    calib_dir.mkdir(exist_ok=True)
+    calib_path = calib_dir / f"{calibration_key(camera, exposure)}.npz"
+
+    if calib_path.exists():
+        if not overwrite:
+            click.echo(f"Calibration file {calib_path} already exist")
+            return
+        calib_path.unlink()
+
+    try:
+        dark = build_master(cwd / dark_dir)
+        click.echo(f"Master dark frame built from {dark_dir}")
+
+        flat = None
+        if flat_dir is not None:
+            flat = build_master(cwd / flat_dir)
+            click.echo(f"Master flat frame built from {flat_dir}")
+
+        export_calibration(calib_path, dark, flat)
+        click.echo(f"Calibration file {calib_path} created")
+
+    except FileNotFoundError as e:
+        lg(__name__).error(f"File not found: {e}")
+    except Exception as e:
+        lg(__name__).error(f"Error: {e}")
@@ -1,26 +1,18 @@
 from pathlib import Path
 from logging import getLogger as lg
-import os
-import re
 
 import numpy as np
 import click
 
-from util import export_grad_poly, import_image
+from util import export_grad_poly, import_corrector, iter_images
 
 # TODO: T on I calibration
 T = lambda I: 108.0958765*I*I*I-511.9765339*I*I+1617.95649045*I+537.60415503
 
 # IMPORTANT: for vertical wire
 def wire_brightness(image: np.ndarray, choose_percentage: float = .3) -> tuple[np.floating, np.floating]:
-    def j_maxs(img_array):
-        res = []
-        for i in range(img_array.shape[0]):
-            res.append(np.argmax(img_array[i]))
-        return np.array(res)
-    
     i_arr = np.arange(image.shape[0])
-    j_max = j_maxs(image)
+    j_max = np.argmax(image, axis=1)
     Y_max = image[i_arr, j_max]
 
     # filter very low values
@@ -42,8 +34,9 @@ def grad_poly_fit(means: np.ndarray, temperatures: np.ndarray, fit_order: int =
 
 @click.command()
 @click.option("--overwrite", is_flag=True, help="Разрешить перезапись градуировки")
+@click.option("--pack", "pack_dir", default=None, help="Набор, созданный командой pack, вместо изображений каталога градуировок")
 @click.pass_context
-def grad(ctx: click.Context, overwrite: bool):
+def grad(ctx: click.Context, overwrite: bool, pack_dir: str | None):
     cwd = Path().cwd()
     grad_dir = cwd / str(ctx.obj['GRAD_DIR'])
     grad_name = ctx.obj['GRAD_NAME']
@@ -60,18 +53,13 @@ def grad(ctx: click.Context, overwrite: bool):
     means = []
     temperatures = []
     try:
-        for filename in os.listdir(grad_dir):
-            if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                continue
-            
-            image = import_image(grad_dir / filename)
-
-            match = re.search(r'\d{4}', filename)
-            if match is None:
+        corrector = import_corrector(cwd / str(ctx.obj['CALIB_DIR']), ctx.obj['CALIBRATION'])
+        images_path = grad_dir if pack_dir is None else cwd / pack_dir
+        for filename, image, current in iter_images(images_path, corrector=corrector):
+            if current is None:
                 lg(__name__).error(f"There is no current value in filename: {filename}")
                 continue
 
-            current = np.float64(match.group()) / 1000
             temperature = T(current)
             mean, _ = wire_brightness(image)
 
@@ -0,0 +1,36 @@
+from pathlib import Path
+from logging import getLogger as lg
+
+import click
+
+from pack import PACK_INDEX, export_pack
+
+@click.command()
+@click.option("--input-dir", default="INPUT_IMAGES", help="Каталог с изображениями")
+@click.option("--output-dir", default="PACK", help="Каталог создаваемого набора")
+@click.option("--chunk-size", default=256, help="Максимальное количество изображений в одном блоке")
+@click.option("--overwrite", is_flag=True, help="Разрешить перезапись набора")
+def pack(input_dir: str, output_dir: str, chunk_size: int, overwrite: bool):
+    cwd = Path().cwd()
+    input_path = cwd / input_dir
+    output_path = cwd / output_dir
+
+    if (output_path / PACK_INDEX).exists():
+        if not overwrite:
+            click.echo(f"Pack {output_path} already exist")
+            return
+        for path in output_path.glob("chunk_*.npy"):
+            path.unlink()
+        (output_path / PACK_INDEX).unlink()
+
+    try:
+        count = export_pack(input_path, output_path, chunk_size)
+        if count == 0:
+            click.echo(f"No images in {input_path}")
+            return
+        click.echo(f"Packed {count} images into {output_path}")
+
+    except FileNotFoundError as e:
+        lg(__name__).error(f"File not found: {e}")
+    except Exception as e:
+        lg(__name__).error(f"Error: {e}")
@@ -0,0 +1,79 @@
+from pathlib import Path
+from logging import getLogger as lg
+
+import numpy as np
+import click
+
+from util import import_corrector, import_grad_poly, iter_images
+from wire_profile import wire_profiles
+
+@click.command()
+@click.option("--input-dir", default="INPUT_IMAGES", help="Каталог с изображениями нити")
+@click.option("--output", default="profiles.npz", help="Файл для сохранения профилей")
+@click.option("--samples", default=200, help="Количество точек вдоль нити")
+@click.option("--half-width", default=5., help="Половина ширины поперечного сечения (пиксели)")
+@click.option("--batch", default=32, help="Количество кадров, обрабатываемых за один вызов")
+@click.pass_context
+def profile(ctx: click.Context, input_dir: str, output: str, samples: int, half_width: float, batch: int):
+    cwd = Path().cwd()
+    grad_name = ctx.obj['GRAD_NAME']
+    grad_dir = ctx.obj['GRAD_DIR']
+
+    grad_path = cwd / grad_dir / f"{grad_name}.grad"
+    click.echo(f"Using graduation {grad_name}")
+
+    input_path = cwd / input_dir
+    output_path = cwd / output
+
+    filenames = []
+    centerlines = []
+    brightness = []
+    across = []
+
+    def process(batch_names, batch_images):
+        c, a, ac = wire_profiles(np.stack(batch_images), n_samples=samples, half_width=half_width)
+        filenames.extend(batch_names)
+        centerlines.append(c)
+        brightness.append(a)
+        across.append(ac)
+        for name, failed in zip(batch_names, np.isnan(a).all(axis=-1)):
+            if failed:
+                lg(__name__).error(f"Wire not found in {name}, profile set to NaN")
+            else:
+                click.echo(f"Processed {name}")
+
+    try:
+        grad_poly = import_grad_poly(grad_path)
+        corrector = import_corrector(cwd / ctx.obj['CALIB_DIR'], ctx.obj['CALIBRATION'])
+
+        # Кадры одного размера собираются в пачки и обрабатываются вместе
+        batch_names, batch_images = [], []
+        for filename, image, _ in iter_images(input_path, corrector=corrector):
+            if batch_images and (image.shape != batch_images[0].shape or len(batch_images) >= batch):
+                process(batch_names, batch_images)
+                batch_names, batch_images = [], []
+            batch_names.append(filename)
+            batch_images.append(image)
+
+        if batch_images:
+            process(batch_names, batch_images)
+
+        if not filenames:
+            click.echo(f"No images in {input_path}")
+            return
+
+        brightness = np.concatenate(brightness)
+        np.savez_compressed(
+            output_path,
+            filenames=np.array(filenames),
+            centerlines=np.concatenate(centerlines),
+            brightness=brightness,
+            temperature=grad_poly(brightness),
+            across=np.concatenate(across),
+        )
+        click.echo(f"Profiles saved to {output_path}")
+
+    except FileNotFoundError as e:
+        lg(__name__).error(f"File not found: {e}")
+    except Exception as e:
+        lg(__name__).error(f"Error processing files: {e}")
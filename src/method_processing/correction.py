@@ -0,0 +1,120 @@
+from pathlib import Path
+import os
+
+import numpy as np
+import cv2
+
+def calibration_key(camera: str, exposure: float) -> str:
+    """Имя файла калибровки для камеры и экспозиции"""
+    return f"{camera}_exp{exposure:g}"
+
+def build_master(directory: Path) -> np.ndarray:
+    """
+    Мастер-кадр: медиана по всем изображениям каталога
+
+    Медиана убирает из мастер-кадра случайные выбросы (например,
+    космические частицы), оставляя постоянную составляющую сенсора.
+
+    Args:
+        directory: Каталог с кадрами одного размера
+
+    Returns:
+        Мастер-кадр float32
+    """
+    frames = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+        frames.append(cv2.imread(str((directory / filename).resolve()), cv2.IMREAD_UNCHANGED))
+
+    if not frames:
+        raise FileNotFoundError(f"No frames in {directory}")
+    return np.median(np.stack(frames), axis=0).astype(np.float32)
+
+def export_calibration(path: Path, dark: np.ndarray, flat: np.ndarray | None = None) -> None:
+    """
+    Сохраняет темновой кадр и коэффициенты плоского поля
+
+    Коэффициент пикселя - отношение средней чувствительности к его
+    собственной (flat - dark). Пиксели без отклика получают коэффициент 1.
+    """
+    if flat is None:
+        gain = np.ones_like(dark)
+    else:
+        response = flat - dark
+        gain = np.ones_like(response)
+        valid = response > 1
+        gain[valid] = response[valid].mean() / response[valid]
+
+    np.savez(path, dark=dark.astype(np.float32), gain=gain.astype(np.float32))
+
+class FrameCorrector:
+    """
+    Коррекция темнового кадра и плоского поля: (image - dark) * gain.
+
+    Мастер-кадры приводятся к числу каналов изображения один раз и
+    хранятся вместе с рабочим буфером, поэтому коррекция кадра - это
+    несколько векторных операций без выделения памяти. Можно
+    корректировать часть кадра (ROI), указав её смещение.
+    """
+    def __init__(self, dark: np.ndarray, gain: np.ndarray):
+        self.dark = dark
+        self.gain = gain
+        self.shape = dark.shape[:2]
+        self._masters = {}
+        self._scratch = None
+
+    @classmethod
+    def load(cls, path: Path) -> "FrameCorrector":
+        """Загружает калибровку, сохраненную export_calibration"""
+        with np.load(path) as data:
+            return cls(data["dark"], data["gain"])
+
+    def _masters_for(self, channels: int) -> tuple[np.ndarray, np.ndarray]:
+        """Мастер-кадры с нужным числом каналов (1 - оттенки серого)"""
+        if channels not in self._masters:
+            dark, gain = self.dark, self.gain
+            if dark.ndim == 3 and channels == 1:
+                dark = cv2.cvtColor(dark, cv2.COLOR_BGR2GRAY)
+                gain = cv2.cvtColor(gain, cv2.COLOR_BGR2GRAY)
+            elif dark.ndim == 2 and channels > 1:
+                dark = dark[..., None]
+                gain = gain[..., None]
+            self._masters[channels] = (dark, gain)
+        return self._masters[channels]
+
+    def apply(self, image: np.ndarray, out: np.ndarray | None = None,
+              offset: tuple[int, int] = (0, 0)) -> np.ndarray:
+        """
+        Корректирует изображение
+
+        Args:
+            image: Кадр или его часть (uint8, оттенки серого или BGR)
+            out: Буфер для результата, по умолчанию создается новый
+            offset: Положение (y, x) изображения в полном кадре
+
+        Returns:
+            Исправленное изображение того же типа
+        """
+        h, w = image.shape[:2]
+        y, x = offset
+        if y + h > self.shape[0] or x + w > self.shape[1]:
+            raise ValueError(f"Image region does not fit calibration frame {self.shape}")
+
+        dark, gain = self._masters_for(image.shape[2] if image.ndim == 3 else 1)
+        dark = dark[y:y + h, x:x + w]
+        gain = gain[y:y + h, x:x + w]
+
+        if self._scratch is None or self._scratch.shape != image.shape:
+            self._scratch = np.empty(image.shape, dtype=np.float32)
+        scratch = self._scratch
+
+        np.subtract(image, dark, out=scratch)
+        np.multiply(scratch, gain, out=scratch)
+        np.rint(scratch, out=scratch)
+        np.clip(scratch, 0, np.iinfo(image.dtype).max, out=scratch)
+
+        if out is None:
+            out = np.empty_like(image)
+        np.copyto(out, scratch, casting='unsafe')
+        return out
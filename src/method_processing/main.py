@@ -3,7 +3,10 @@ import logging
 import sys
 
 from cmd_apply import apply
+from cmd_calib import calib
 from cmd_grad import grad
+from cmd_pack import pack
+from cmd_profile import profile
 
 # Configure logging to stdout
 logging.basicConfig(
@@ -16,17 +19,24 @@ logging.basicConfig(
 @click.option("--debug", is_flag=True, help="Включить логгинг дебага")
 @click.option("--grad-name", default="ns11_ns7", help="Название градуировки (без расширения .grad)")
 @click.option("--grad-dir", default="GRADUATION", help="Каталог с файлами градуировок")
+@click.option("--calib-dir", default="CALIBRATION", help="Каталог с калибровками темнового кадра и плоского поля")
+@click.option("--calibration", default=None, help="Название калибровки (без расширения .npz), по умолчанию без коррекции")
 @click.pass_context
-def main(ctx: click.Context, debug: bool, grad_name: str, grad_dir: str):
+def main(ctx: click.Context, debug: bool, grad_name: str, grad_dir: str, calib_dir: str, calibration: str | None):
     if debug:
         logging.getLogger().setLevel(logging.DEBUG)
         
     ctx.ensure_object(dict)
     ctx.obj['GRAD_NAME'] = grad_name
     ctx.obj['GRAD_DIR'] = grad_dir
+    ctx.obj['CALIB_DIR'] = calib_dir
+    ctx.obj['CALIBRATION'] = calibration
 
 main.add_command(apply)
 main.add_command(grad)
+main.add_command(profile)
+main.add_command(calib)
+main.add_command(pack)
 
 if __name__ == "__main__":
     main()
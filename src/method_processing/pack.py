@@ -0,0 +1,98 @@
+from pathlib import Path
+import json
+import os
+import re
+
+import numpy as np
+import cv2
+
+# Файл с описанием набора в его каталоге
+PACK_INDEX = "index.json"
+
+def parse_current(filename: str) -> float | None:
+    """Ток (А) из имени файла: первые четыре цифры в миллиамперах"""
+    match = re.search(r'\d{4}', filename)
+    if match is None:
+        return None
+    return float(match.group()) / 1000
+
+def is_pack(path: Path) -> bool:
+    """Является ли каталог набором, созданным export_pack"""
+    return (path / PACK_INDEX).exists()
+
+def export_pack(input_path: Path, output_path: Path, chunk_size: int = 256,
+                flags: int = cv2.IMREAD_GRAYSCALE) -> int:
+    """
+    Собирает изображения каталога в набор для повторной обработки без декодирования.
+
+    Декодированные изображения одного размера складываются в блоки
+    chunk_<n>.npy по chunk_size штук, которые потом открываются через
+    memmap. В index.json для каждого изображения записаны имя файла,
+    блок и позиция в нем, ток из имени файла и время изменения файла.
+
+    Args:
+        input_path: Каталог с изображениями
+        output_path: Каталог набора (будет создан)
+        chunk_size: Максимальное количество изображений в блоке
+        flags: Флаги cv2.imread (по умолчанию оттенки серого, как у import_image)
+
+    Returns:
+        Количество упакованных изображений
+    """
+    output_path.mkdir(parents=True, exist_ok=True)
+    images = []
+    chunks = []
+    chunk = []
+
+    def flush():
+        if chunk:
+            np.save(output_path / f"chunk_{len(chunks)}.npy", np.stack(chunk))
+            chunks.append(len(chunk))
+            chunk.clear()
+
+    for filename in sorted(os.listdir(input_path)):
+        if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+
+        path = input_path / filename
+        image = cv2.imread(str(path.resolve()), flags)
+        if chunk and (image.shape != chunk[0].shape or len(chunk) >= chunk_size):
+            flush()
+
+        images.append({
+            "filename": filename,
+            "chunk": len(chunks),
+            "index": len(chunk),
+            "current": parse_current(filename),
+            "timestamp": path.stat().st_mtime,
+        })
+        chunk.append(image)
+    flush()
+
+    with open(output_path / PACK_INDEX, "w") as f:
+        json.dump({"chunks": chunks, "images": images}, f, indent=1)
+    return len(images)
+
+class ImagePack:
+    """
+    Набор изображений, созданный export_pack.
+
+    Блоки открываются через memmap только для чтения, поэтому изображение
+    - это срез блока без копирования и без декодирования.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path / PACK_INDEX) as f:
+            index = json.load(f)
+        self.images = index["images"]
+        self._chunks = [
+            np.load(path / f"chunk_{i}.npy", mmap_mode="r") for i in range(len(index["chunks"]))
+        ]
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def image(self, i: int) -> np.ndarray:
+        """Изображение с номером i (только для чтения)"""
+        entry = self.images[i]
+        return self._chunks[entry["chunk"]][entry["index"]]
@@ -0,0 +1,74 @@
+from pathlib import Path
+import json
+
+import numpy as np
+import cv2
+
+# Файл с описанием пирамиды в её каталоге
+PYRAMID_META = "pyramid.json"
+
+def export_pyramid(path: Path, data: np.ndarray, tile_size: int = 256) -> None:
+    """
+    Сохраняет карту в виде тайловой пирамиды.
+
+    Уровень 0 - исходное разрешение, каждый следующий уменьшен вдвое
+    усреднением, пока изображение не поместится в один тайл. Тайлы
+    хранятся как float32 .npy в каталогах level_<n>.
+
+    Args:
+        path: Каталог пирамиды (будет создан)
+        data: Двумерная карта (например, температуры)
+        tile_size: Размер стороны тайла
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    level_data = np.asarray(data, dtype=np.float32)
+    levels = []
+
+    while True:
+        level = len(levels)
+        level_path = path / f"level_{level}"
+        level_path.mkdir(exist_ok=True)
+
+        h, w = level_data.shape
+        for ty in range(0, h, tile_size):
+            for tx in range(0, w, tile_size):
+                tile = level_data[ty:ty + tile_size, tx:tx + tile_size]
+                np.save(level_path / f"{ty // tile_size}_{tx // tile_size}.npy", tile)
+        levels.append([h, w])
+
+        if max(h, w) <= tile_size:
+            break
+        level_data = cv2.resize(
+            level_data, ((w + 1) // 2, (h + 1) // 2), interpolation=cv2.INTER_AREA
+        )
+
+    meta = {
+        "shape": list(data.shape),
+        "tile_size": tile_size,
+        "levels": levels,
+        "min": float(np.nanmin(data)),
+        "max": float(np.nanmax(data)),
+    }
+    with open(path / PYRAMID_META, "w") as f:
+        json.dump(meta, f)
+
+class PyramidReader:
+    """Чтение тайлов пирамиды, сохраненной export_pyramid"""
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path / PYRAMID_META) as f:
+            meta = json.load(f)
+        self.shape = tuple(meta["shape"])
+        self.tile_size = meta["tile_size"]
+        self.levels = [tuple(level) for level in meta["levels"]]
+        self.min = meta["min"]
+        self.max = meta["max"]
+
+    def grid(self, level: int) -> tuple[int, int]:
+        """Количество тайлов уровня по вертикали и горизонтали"""
+        h, w = self.levels[level]
+        return -(-h // self.tile_size), -(-w // self.tile_size)
+
+    def tile(self, level: int, ty: int, tx: int) -> np.ndarray:
+        """Загружает тайл уровня level с индексами (ty, tx)"""
+        return np.load(self.path / f"level_{level}" / f"{ty}_{tx}.npy")
@@ -1,9 +1,14 @@
 from pathlib import Path
+from typing import Iterator
+import os
 import numpy as np
 from logging import getLogger as lg
 import msgpack_numpy as mnp
 import cv2
 
+from correction import FrameCorrector
+from pack import ImagePack, is_pack, parse_current
+
 def export_grad_poly(path: Path, poly: np.poly1d) -> None:
     z = poly.coefficients
 
@@ -19,7 +24,48 @@ def import_grad_poly(path: Path) -> np.poly1d:
         z = np.array(mnp.load(f))
     return np.poly1d(z)
 
-def import_image(path: Path, flags: int = cv2.IMREAD_GRAYSCALE, threshold: int = 40) -> np.ndarray:
+def import_corrector(calib_dir: Path, name: str | None) -> FrameCorrector | None:
+    if name is None:
+        return None
+    return FrameCorrector.load(calib_dir / f"{name}.npz")
+
+def prepare_image(image: np.ndarray, threshold: int = 40,
+                  corrector: FrameCorrector | None = None) -> np.ndarray:
+    """Коррекция и отсечение фона; исходное изображение не изменяется"""
+    if corrector is not None:
+        image = corrector.apply(image)
+        image[image < threshold] = 0
+        return image
+    return np.where(image < threshold, 0, image).astype(image.dtype, copy=False)
+
+def import_image(path: Path, flags: int = cv2.IMREAD_GRAYSCALE, threshold: int = 40,
+                 corrector: FrameCorrector | None = None) -> np.ndarray:
     image = cv2.imread(str(path.resolve()), flags)
+    if corrector is not None:
+        image = corrector.apply(image)
     image[image < threshold] = 0
     return image
+
+def iter_images(input_path: Path, threshold: int = 40,
+                corrector: FrameCorrector | None = None) -> Iterator[tuple[str, np.ndarray, float | None]]:
+    """
+    Изображения каталога или набора, созданного командой pack
+
+    Из набора изображения берутся срезами memmap без декодирования,
+    а ток - из его индекса; из обычного каталога изображения читаются
+    по одному через import_image, а ток разбирается из имени файла.
+
+    Yields:
+        Имя файла, изображение после коррекции и отсечения фона и ток (А) или None
+    """
+    if is_pack(input_path):
+        pack = ImagePack(input_path)
+        for i, entry in enumerate(pack.images):
+            yield entry["filename"], prepare_image(pack.image(i), threshold, corrector), entry["current"]
+        return
+
+    for filename in sorted(os.listdir(input_path)):
+        if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+        image = import_image(input_path / filename, threshold=threshold, corrector=corrector)
+        yield filename, image, parse_current(filename)
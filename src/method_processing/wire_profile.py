@@ -0,0 +1,165 @@
+import numpy as np
+from scipy.interpolate import splprep, splev
+from scipy.ndimage import map_coordinates
+
+# По одной точке нити в каждой строке: нить должна идти сверху вниз
+# (горизонтальные нити wire_profiles поворачивает сама)
+def subpixel_peaks(images: np.ndarray, radius: int = 6) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Субпиксельное положение нити в каждой строке
+
+    Положение - центр тяжести пикселей выше половины максимума в окне
+    radius вокруг argmax. В отличие от параболы по трем точкам, это
+    работает и для широкой нити с плоской вершиной, где argmax
+    случайно попадает в любую точку вершины.
+
+    Args:
+        images: Изображение (H, W) или стопка изображений (F, H, W)
+        radius: Половина ширины окна (пиксели), должна перекрывать нить
+
+    Returns:
+        Положения нити по X и значения максимумов, форма (..., H)
+    """
+    j = np.argmax(images, axis=-1)[..., None]
+    cols = np.clip(j + np.arange(-radius, radius + 1), 0, images.shape[-1] - 1)
+    window = np.take_along_axis(images, cols, axis=-1).astype(np.float32)
+
+    peak = window.max(axis=-1, keepdims=True)
+    half = (peak + window.min(axis=-1, keepdims=True)) / 2
+    weights = np.maximum(window - half, 0)
+    total = weights.sum(axis=-1)
+    x = np.divide((weights * cols).sum(axis=-1), total, out=j[..., 0].astype(np.float32), where=total > 0)
+    return x, peak[..., 0]
+
+def fit_centerline(x_peaks: np.ndarray, peaks: np.ndarray, n_samples: int = 200,
+                   smoothing: float | None = None, threshold: float = .8) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Сглаживающий сплайн по центру нити
+
+    Args:
+        x_peaks: Положения максимумов по строкам
+        peaks: Значения максимумов по строкам
+        n_samples: Количество точек вдоль нити
+        smoothing: Параметр сглаживания splprep, по умолчанию число точек * s^2,
+            где s - разброс положений центра, оцененный по вторым разностям
+            (плавный изгиб нити на них почти не влияет)
+        threshold: Строки с максимумом ниже threshold * среднее отбрасываются
+
+    Returns:
+        Точки центра нити (n_samples, 2) и единичные нормали к ней (n_samples, 2), в порядке (x, y)
+    """
+    rows = np.arange(len(x_peaks), dtype=np.float32)
+    idx = peaks > peaks.mean() * threshold
+    if np.count_nonzero(idx) < 4:
+        raise ValueError("Too few wire points to fit a centerline")
+
+    x, y = x_peaks[idx], rows[idx]
+    if smoothing is None:
+        # Медиана устойчива к отдельным выбросам; вторая разность шума имеет дисперсию 6 s^2
+        d2 = np.diff(x, 2)
+        scatter = 1.4826 * np.median(np.abs(d2 - np.median(d2))) / np.sqrt(6)
+        smoothing = len(x) * max(scatter, .05) ** 2
+    tck, _ = splprep([x, y], s=smoothing, k=3)
+    u = np.linspace(0, 1, n_samples)
+    cx, cy = splev(u, tck)
+    tx, ty = splev(u, tck, der=1)
+
+    norm = np.hypot(tx, ty)
+    centerline = np.stack([cx, cy], axis=-1)
+    normals = np.stack([-ty / norm, tx / norm], axis=-1)
+    return centerline, normals
+
+def is_horizontal(frames: np.ndarray) -> bool:
+    """
+    Идет ли нить скорее слева направо, чем сверху вниз
+
+    Вертикальная нить дает резкий пик в средней яркости столбцов,
+    горизонтальная - в средней яркости строк.
+    """
+    mean = frames.reshape(-1, *frames.shape[-2:]).mean(axis=0)
+    return np.ptp(mean.mean(axis=1)) > np.ptp(mean.mean(axis=0))
+
+def wire_profiles(frames: np.ndarray, n_samples: int = 200, half_width: float = 5.,
+                  n_across: int = 11, smoothing: float | None = None
+                  ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Профили яркости вдоль и поперек нити для стопки кадров
+
+    Центр нити ищется с субпиксельной точностью и аппроксимируется
+    сплайном, поэтому изогнутые и провисшие нити обрабатываются так же,
+    как прямые. Горизонтальная нить ищется по столбцам вместо строк,
+    но нить должна идти поперек кадра: нить, отклоненная от оси больше
+    чем на 45 градусов на части длины (например, петля), не поддерживается.
+    Яркость для всех кадров снимается одним вызовом билинейной интерполяции.
+
+    Args:
+        frames: Изображение (H, W) или стопка изображений (F, H, W) одного размера
+        n_samples: Количество точек вдоль нити
+        half_width: Половина ширины поперечного сечения (пиксели)
+        n_across: Количество точек поперек нити
+        smoothing: Параметр сглаживания сплайна центра нити
+
+    Returns:
+        Центры нити (F, n_samples, 2), яркость вдоль нити (F, n_samples)
+        и поперечные профили (F, n_samples, n_across). Для кадров, на которых
+        нить не найдена (например, темный кадр) или центр нити выходит за
+        пределы кадра, все значения - NaN
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 2:
+        frames = frames[None]
+
+    # Для горизонтальной нити ищем центр в повернутых кадрах
+    horizontal = is_horizontal(frames)
+    x_peaks, peaks = subpixel_peaks(frames.swapaxes(-1, -2) if horizontal else frames)
+    centerlines = np.empty((len(frames), n_samples, 2), dtype=np.float32)
+    normals = np.empty_like(centerlines)
+    failed = np.zeros(len(frames), dtype=bool)
+    h, w = frames.shape[-2:]
+    for f in range(len(frames)):
+        try:
+            centerline, normal = fit_centerline(x_peaks[f], peaks[f], n_samples, smoothing)
+        except ValueError:
+            # Кадр без нити не должен прерывать обработку остальных
+            centerline = None
+        if centerline is not None and horizontal:
+            centerline, normal = centerline[:, ::-1], normal[:, ::-1]
+
+        # Сплайн, ушедший за край кадра, снимал бы яркость фона
+        if (centerline is None or centerline.min() < -.5
+                or (centerline[:, 0] > w - .5).any() or (centerline[:, 1] > h - .5).any()):
+            failed[f] = True
+            centerlines[f] = 0
+            normals[f] = 0
+        else:
+            centerlines[f], normals[f] = centerline, normal
+
+    offsets = np.linspace(-half_width, half_width, n_across, dtype=np.float32)
+    px = centerlines[..., 0, None] + normals[..., 0, None] * offsets
+    py = centerlines[..., 1, None] + normals[..., 1, None] * offsets
+    pf = np.broadcast_to(np.arange(len(frames), dtype=np.float32)[:, None, None], px.shape)
+
+    across = map_coordinates(frames, [pf, py, px], order=1, mode='nearest', output=np.float32)
+
+    # Как и в wire_brightness, яркость нити - максимум по сечению
+    along = across.max(axis=-1)
+
+    centerlines[failed] = np.nan
+    along[failed] = np.nan
+    across[failed] = np.nan
+    return centerlines, along, across
+
+def temperature_profiles(frames: np.ndarray, grad_poly: np.poly1d, **kwargs) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Профили температуры вдоль нити для стопки кадров
+
+    Args:
+        frames: Изображение (H, W) или стопка изображений (F, H, W)
+        grad_poly: Градуировочный полином яркость -> температура
+        **kwargs: Параметры wire_profiles
+
+    Returns:
+        Центры нити (F, n_samples, 2) и температура вдоль нити (F, n_samples)
+    """
+    centerlines, along, _ = wire_profiles(frames, **kwargs)
+    return centerlines, grad_poly(along)
@@ -0,0 +1,216 @@
+import gc
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+class FramePool:
+    """
+    Пул переиспользуемых буферов кадров с явным владением.
+
+    acquire() выдает свободный буфер с одним владельцем - вызывающим кодом.
+    Всякий, кто хранит буфер или срез-представление из него дольше, чем
+    владелец (поток интерфейса до отрисовки, синхронизатор камер), вызывает
+    retain(), а закончив - release(). Буфер выдается снова только после того,
+    как все владельцы его вернули, поэтому кадр, который ещё отображается,
+    не будет перезаписан. Методы можно вызывать из разных потоков.
+    """
+    def __init__(self, max_buffers: int = 128):
+        self.max_buffers = max_buffers
+        self.allocations = 0
+        self._buffers: list[np.ndarray] = []
+        self._holds: list[int] = []
+        self._lock = threading.Lock()
+
+    def _find(self, array: np.ndarray) -> int:
+        """Номер буфера пула, которому принадлежит массив или его срез, либо -1"""
+        base = array if array.base is None else array.base
+        for i, buffer in enumerate(self._buffers):
+            if buffer is base:
+                return i
+        return -1
+
+    def acquire(self, shape: tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """
+        Выдает свободный буфер заданной формы, при необходимости создает новый
+
+        Args:
+            shape: Форма буфера
+            dtype: Тип элементов
+
+        Returns:
+            Буфер с одним владельцем; вернуть его нужно через release()
+        """
+        with self._lock:
+            for i, buffer in enumerate(self._buffers):
+                if self._holds[i] == 0 and buffer.shape == shape and buffer.dtype == dtype:
+                    self._holds[i] = 1
+                    return buffer
+
+            # Пул разросся (например, после смены размера ROI) - забываем свободные буферы
+            if len(self._buffers) >= self.max_buffers:
+                kept = [i for i, holds in enumerate(self._holds) if holds > 0]
+                self._buffers = [self._buffers[i] for i in kept]
+                self._holds = [self._holds[i] for i in kept]
+
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers.append(buffer)
+            self._holds.append(1)
+            self.allocations += 1
+            return buffer
+
+    def retain(self, array: np.ndarray | None) -> None:
+        """Добавляет владельца буферу, из которого взят массив (массивы не из пула игнорируются)"""
+        if array is None:
+            return
+        with self._lock:
+            i = self._find(array)
+            if i >= 0:
+                self._holds[i] += 1
+
+    def release(self, array: np.ndarray | None) -> None:
+        """Возвращает буфер, из которого взят массив; при последнем возврате буфер свободен"""
+        if array is None:
+            return
+        with self._lock:
+            i = self._find(array)
+            if i >= 0 and self._holds[i] > 0:
+                self._holds[i] -= 1
+
+class RoiAverager:
+    """
+    Скользящее среднее последних length кадров ROI без выделения памяти на кадр.
+
+    Кадры хранятся в кольцевом массиве, а их сумма - в целочисленном
+    аккумуляторе, из которого вычитается самый старый кадр и прибавляется
+    новый. Результат совпадает с усреднением во float и отбрасыванием
+    дробной части.
+
+    push() вызывается из потока захвата, а reset() - из потока интерфейса,
+    поэтому reset() только ставит флаг, а сброс выполняет следующий push().
+    """
+    def __init__(self, length: int = 20):
+        self.length = length
+        self.allocations = 0
+        self._frames = None
+        self._sum = None
+        self._scratch = None
+        self._count = 0
+        self._index = 0
+        self._divisor = np.zeros((), dtype=np.int32)
+        self._reset_requested = False
+
+    def reset(self) -> None:
+        """Сбрасывает накопленные кадры перед следующим push()"""
+        self._reset_requested = True
+
+    def push(self, roi: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Добавляет кадр ROI и записывает среднее в out
+
+        Args:
+            roi: Новый кадр ROI (uint8)
+            out: Буфер той же формы для результата
+
+        Returns:
+            out
+        """
+        if self._reset_requested:
+            self._reset_requested = False
+            if self._sum is not None:
+                self._sum.fill(0)
+            self._count = 0
+            self._index = 0
+
+        if self._frames is None or self._frames.shape[1:] != roi.shape:
+            self._frames = np.empty((self.length, *roi.shape), dtype=np.uint8)
+            self._sum = np.zeros(roi.shape, dtype=np.int32)
+            self._scratch = np.empty(roi.shape, dtype=np.int32)
+            self._count = 0
+            self._index = 0
+            self.allocations += 3
+
+        # Кадры расширяются до int32 через copyto: ufunc со смешанными типами
+        # выделял бы буфер приведения на каждый вызов
+        slot = self._frames[self._index]
+        if self._count == self.length:
+            np.copyto(self._scratch, slot)
+            np.subtract(self._sum, self._scratch, out=self._sum)
+        else:
+            self._count += 1
+
+        np.copyto(slot, roi)
+        np.copyto(self._scratch, slot)
+        np.add(self._sum, self._scratch, out=self._sum)
+        self._index = (self._index + 1) % self.length
+
+        self._divisor[()] = self._count
+        np.floor_divide(self._sum, self._divisor, out=self._scratch)
+        np.copyto(out, self._scratch, casting='unsafe')
+        return out
+
+class GcPauseMonitor:
+    """Суммарное время и количество пауз сборщика мусора в процессе"""
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self._start = None
+
+    def _callback(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.total += time.perf_counter() - self._start
+            self.count += 1
+            self._start = None
+
+    def start(self) -> None:
+        """Включает наблюдение за сборщиком мусора"""
+        if self._callback not in gc.callbacks:
+            gc.callbacks.append(self._callback)
+
+    def close(self) -> None:
+        """Отключает наблюдение за сборщиком мусора"""
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+
+class AllocationMonitor:
+    """
+    Память, выделенная за кадр, по данным tracemalloc.
+
+    numpy сообщает tracemalloc о буферах массивов, поэтому учитываются
+    и временные массивы, и объекты Python. Считается пик отслеживаемой
+    памяти сверх уровня начала кадра, так что выделенная и освобожденная
+    внутри кадра память тоже видна. tracemalloc общий для процесса:
+    в результат попадают и выделения других потоков за то же время.
+    Пока enabled равен False, tracemalloc не запускается и не замедляет работу.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._started = False
+        self._base = 0
+
+    def begin(self) -> None:
+        """Отмечает начало кадра, при необходимости запускает или останавливает tracemalloc"""
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        elif not self.enabled and self._started:
+            self.close()
+
+        if self.enabled:
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+    def end(self) -> int:
+        """Байт выделено с начала кадра (0, если наблюдение выключено)"""
+        if not self.enabled or not tracemalloc.is_tracing():
+            return 0
+        return max(tracemalloc.get_traced_memory()[1] - self._base, 0)
+
+    def close(self) -> None:
+        """Останавливает tracemalloc, если его запустил этот монитор"""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
@@ -0,0 +1,159 @@
+import csv
+import logging
+import signal
+import sys
+import time
+from datetime import datetime
+from logging import getLogger as lg
+from pathlib import Path
+
+import click
+import cv2
+
+from buffers import FramePool
+from pipeline import RoiPipeline, calibration_path, clip_roi, load_corrector
+from temperature_logger import TemperatureLogger
+from streaming import ReadingPublisher
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stdout
+)
+
+@click.command()
+@click.option("--camera", default=0, help="Индекс камеры")
+@click.option("--roi", nargs=4, type=int, required=True, help="Область интереса: X1 Y1 X2 Y2")
+@click.option("--average", default=20, help="Количество усредняемых кадров ROI")
+@click.option("--interval", default=1.0, help="Период записи результата (с)")
+@click.option("--frame-interval", default=0.03, help="Пауза после каждого кадра (с); 0.03 - как в графическом интерфейсе, чтобы --average кадров охватывали то же время")
+@click.option("--output-dir", default="headless", help="Каталог для сохранения результата")
+@click.option("--save-frames", is_flag=True, help="Сохранять усредненные ROI как изображения")
+@click.option("--grad", "grad_path", default=None, help="Файл градуировки для записи температуры нити")
+@click.option("--calibration", "calibration_file", default=None, help="Файл калибровки темнового кадра и плоского поля (.npz); по умолчанию - из каталога CALIBRATION, как в графическом интерфейсе")
+@click.option("--track", is_flag=True, help="Сдвигать ROI вслед за нитью")
+@click.option("--stream", "stream_address", default=None, help="Транслировать результаты на адрес (tcp://host:port или unix:///path)")
+@click.option("--stream-frames", is_flag=True, help="Добавлять в трансляцию усредненный ROI")
+def headless(camera: int, roi: tuple[int, int, int, int], average: int, interval: float, frame_interval: float,
+             output_dir: str, save_frames: bool, grad_path: str | None, calibration_file: str | None,
+             track: bool, stream_address: str | None, stream_frames: bool):
+    """Захват и усреднение ROI без графического интерфейса"""
+    # Камера открывается первой, чтобы при ошибке не оставлять открытых файлов и сокетов
+    cap = cv2.VideoCapture(camera)
+    if not cap.isOpened():
+        lg(__name__).error(f"Camera {camera} is not available")
+        return
+
+    output_path = Path(output_dir) / datetime.now().strftime(r"%Y-%m-%d_%H-%M-%S")
+    output_path.mkdir(parents=True)
+
+    temperature_logger = None
+    publisher = None
+    try:
+        if grad_path is not None:
+            temperature_logger = TemperatureLogger(Path(grad_path), output_path / "temperature.bin")
+        if stream_address is not None:
+            try:
+                publisher = ReadingPublisher(
+                    stream_address, Path(grad_path) if grad_path is not None else None, stream_frames
+                )
+            except ValueError as e:
+                raise click.BadParameter(str(e), param_hint="--stream")
+
+        frames, records = _capture(
+            cap, camera, roi, average, interval, frame_interval, output_path, save_frames, track,
+            Path(calibration_file) if calibration_file is not None else None, temperature_logger, publisher
+        )
+    finally:
+        cap.release()
+        if temperature_logger is not None:
+            temperature_logger.close()
+        if publisher is not None:
+            publisher.close()
+    click.echo(f"Stopped after {frames} frames, {records} records written to {output_path}")
+
+def _capture(cap: cv2.VideoCapture, camera: int, roi: tuple[int, int, int, int], average: int,
+             interval: float, frame_interval: float, output_path: Path, save_frames: bool, track: bool,
+             calibration_file: Path | None, temperature_logger: TemperatureLogger | None,
+             publisher: ReadingPublisher | None) -> tuple[int, int]:
+    """Цикл захвата до SIGINT, возвращает количество кадров и записей"""
+    running = True
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+    signal.signal(signal.SIGINT, stop)
+
+    frame_pool = FramePool()
+    pipeline = RoiPipeline(frame_pool, camera, average)
+    pipeline.set_tracking(track)
+    pipeline.temperature_logger = temperature_logger
+    pipeline.publisher = publisher
+    frame_shape = None
+    average_roi = None
+    frames = 0
+    records = 0
+    next_write = time.monotonic() + interval
+
+    click.echo(f"Capturing camera {camera}, ROI x={roi[0]}:{roi[2]}, y={roi[1]}:{roi[3]} into {output_path}")
+    with open(output_path / "brightness.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["time", "frames", "mean", "std", "min", "max"])
+
+        while running:
+            if frame_shape is None:
+                ret, frame = cap.read()
+            else:
+                ret, frame = cap.read(frame_pool.acquire(frame_shape))
+            if not ret:
+                time.sleep(0.01)
+                continue
+            captured = time.monotonic()
+            frames += 1
+
+            if frame_shape is None:
+                x1, y1, x2, y2 = clip_roi(roi, frame.shape)
+                if x1 >= x2 or y1 >= y2:
+                    h, w = frame.shape[:2]
+                    lg(__name__).error(f"ROI is outside of the {w}x{h} frame")
+                    break
+                # Калибровка выбирается так же, как в графическом интерфейсе
+                path = calibration_file or calibration_path(Path("CALIBRATION"), cap, camera)
+                if path is not None:
+                    pipeline.corrector = load_corrector(path, frame.shape)
+            frame_shape = frame.shape
+
+            result = pipeline.process(frame, roi, captured)
+            if result is not None:
+                roi_frame, new_average = result
+                frame_pool.release(roi_frame)
+                # Прежний усредненный ROI больше не нужен, новый хранится до следующего
+                frame_pool.release(average_roi)
+                average_roi = new_average
+            frame_pool.release(frame)
+
+            # Та же пауза между кадрами, что и у VideoThread
+            if frame_interval > 0:
+                time.sleep(frame_interval)
+
+            now = time.monotonic()
+            if now < next_write or average_roi is None:
+                continue
+            next_write = max(next_write + interval, now)
+
+            gray = cv2.cvtColor(average_roi, cv2.COLOR_BGR2GRAY) if len(average_roi.shape) == 3 else average_roi
+            mean, std = cv2.meanStdDev(gray)
+            timestamp = time.time()
+            writer.writerow([
+                f"{timestamp:.3f}", frames,
+                f"{mean[0][0]:.3f}", f"{std[0][0]:.3f}", int(gray.min()), int(gray.max())
+            ])
+            csvfile.flush()
+
+            if save_frames:
+                cv2.imwrite(str(output_path / f"av_roi_{records:06d}.png"), average_roi)
+            records += 1
+
+    return frames, records
+
+if __name__ == "__main__":
+    headless()
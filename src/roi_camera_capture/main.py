@@ -1,11 +1,12 @@
-from window import MainWindow
+from window import MainWindow, MultiCameraWindow
 from PyQt6.QtWidgets import QApplication
 import sys
 
 def main():
     """Точка входа в приложение"""
     app = QApplication(sys.argv)
-    window = MainWindow()
+    # --multi: одновременный захват со всех камер
+    window = MultiCameraWindow() if "--multi" in sys.argv else MainWindow()
     window.show()
     sys.exit(app.exec())
 
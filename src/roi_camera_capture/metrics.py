@@ -0,0 +1,108 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+class PerformanceMetrics:
+    """
+    Замеры времени по этапам обработки кадра.
+
+    Для каждого этапа хранятся последние capacity замеров в кольцевом
+    буфере: запись замера - это пара присваиваний в заранее выделенные
+    массивы, поэтому сбор метрик почти ничего не стоит. Замеры можно
+    добавлять из разных потоков (каждый этап пишет только один поток).
+    """
+    # Этапы и их подписи
+    STAGES = {
+        "capture": "Интервал захвата",
+        "process": "Обработка ROI",
+        "latency": "Задержка сигнала",
+        "display": "Отображение",
+    }
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.dropped_frames = 0
+        self._times = {stage: np.zeros(capacity) for stage in self.STAGES}
+        self._values = {stage: np.zeros(capacity) for stage in self.STAGES}
+        self._counts = dict.fromkeys(self.STAGES, 0)
+
+    def record(self, stage: str, value: float) -> None:
+        """
+        Добавляет замер этапа
+
+        Args:
+            stage: Название этапа из STAGES
+            value: Длительность (с)
+        """
+        i = self._counts[stage] % self.capacity
+        self._times[stage][i] = time.time()
+        self._values[stage][i] = value
+        self._counts[stage] += 1
+
+    def samples(self, stage: str) -> tuple[np.ndarray, np.ndarray]:
+        """Время и значения сохраненных замеров этапа в порядке записи"""
+        count = self._counts[stage]
+        n = min(count, self.capacity)
+        idx = np.arange(count - n, count) % self.capacity
+        return self._times[stage][idx], self._values[stage][idx]
+
+    def summary(self, last: int = 100) -> dict:
+        """
+        Сводка по последним замерам: среднее и 95-й перцентиль (мс) по этапам,
+        частота захвата (к/с) и число пропущенных кадров
+        """
+        result = {}
+        for stage in self.STAGES:
+            _, values = self.samples(stage)
+            values = values[-last:]
+            if len(values) == 0:
+                result[stage] = {"mean_ms": None, "p95_ms": None}
+                continue
+            result[stage] = {
+                "mean_ms": float(values.mean() * 1000),
+                "p95_ms": float(np.percentile(values, 95) * 1000),
+            }
+
+        capture = result["capture"]["mean_ms"]
+        result["fps"] = 1000 / capture if capture else None
+        result["dropped_frames"] = self.dropped_frames
+        return result
+
+    def status_text(self) -> str:
+        """Строка для панели производительности"""
+        summary = self.summary()
+        parts = [f"Захват: {summary['fps']:.1f} к/с" if summary["fps"] else "Захват: -"]
+        for stage in ("process", "latency", "display"):
+            mean = summary[stage]["mean_ms"]
+            p95 = summary[stage]["p95_ms"]
+            label = self.STAGES[stage]
+            parts.append(f"{label}: {mean:.2f} мс (p95 {p95:.2f})" if mean is not None else f"{label}: -")
+        parts.append(f"Пропущено кадров: {summary['dropped_frames']}")
+        return " | ".join(parts)
+
+    def export(self, path: Path) -> None:
+        """
+        Сохраняет журнал замеров: .json - сводка и все замеры,
+        иначе CSV со строками (время, этап, значение в мс)
+        """
+        if path.suffix.lower() == ".json":
+            data = {"summary": self.summary(self.capacity), "samples": {}}
+            for stage in self.STAGES:
+                times, values = self.samples(stage)
+                data["samples"][stage] = {
+                    "time": times.tolist(),
+                    "value_ms": (values * 1000).tolist(),
+                }
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+            return
+
+        with open(path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["time", "stage", "value_ms"])
+            for stage in self.STAGES:
+                times, values = self.samples(stage)
+                writer.writerows(zip(times.tolist(), [stage] * len(times), (values * 1000).tolist()))
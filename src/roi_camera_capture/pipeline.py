@@ -0,0 +1,135 @@
+import sys
+import time
+from logging import getLogger as lg
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from buffers import FramePool, RoiAverager
+from tracking import RoiTracker
+
+# Коррекция кадров общая с method_processing
+sys.path.append(str(Path(__file__).resolve().parent.parent / "method_processing"))
+from correction import FrameCorrector, calibration_key
+
+def calibration_path(calibration_dir: Path, cap: cv2.VideoCapture, camera_index: int) -> Path | None:
+    """Файл калибровки для камеры и её текущей экспозиции (см. команду calib), если он есть"""
+    key = calibration_key(f"cam{camera_index}", cap.get(cv2.CAP_PROP_EXPOSURE))
+    path = calibration_dir / f"{key}.npz"
+    return path if path.exists() else None
+
+def load_corrector(path: Path, frame_shape: tuple[int, ...]) -> FrameCorrector | None:
+    """Загружает калибровку, если она подходит к размеру кадра"""
+    corrector = FrameCorrector.load(path)
+    if corrector.shape != frame_shape[:2]:
+        lg(__name__).error(f"Calibration {path} does not match frame size {frame_shape[:2]}")
+        return None
+    lg(__name__).info(f"Using calibration {path}")
+    return corrector
+
+def clip_roi(roi: tuple[int, int, int, int], frame_shape: tuple[int, ...]) -> tuple[int, int, int, int]:
+    """Упорядочивает углы ROI и ограничивает его границами кадра"""
+    x1, y1 = min(roi[0], roi[2]), min(roi[1], roi[3])
+    x2, y2 = max(roi[0], roi[2]), max(roi[1], roi[3])
+    h, w = frame_shape[:2]
+    return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+class RoiPipeline:
+    """
+    Обработка ROI одного кадра, общая для VideoThread и headless.
+
+    Для каждого кадра: ограничение ROI границами кадра, слежение за нитью,
+    коррекция темнового кадра и плоского поля, усреднение, запись
+    температуры (temperature_logger) и трансляция (publisher).
+
+    В режиме слежения (tracking) ROI сдвигается на смещение нити
+    относительно её положения в момент выделения, размер ROI не меняется.
+    Кадры, на которых нить потеряна, пропускаются.
+
+    Буферы берутся из пула frame_pool. Атрибуты, которые меняет поток
+    интерфейса (temperature_logger, publisher, tracking), читаются один
+    раз за кадр, поэтому их можно менять во время захвата.
+    """
+    def __init__(self, frame_pool: FramePool, camera_index: int = 0, average: int = 20,
+                 clock=time.monotonic):
+        self.frame_pool = frame_pool
+        self.camera_index = camera_index
+        self.clock = clock
+        self.averager = RoiAverager(average)
+        self.corrector = None
+        self.tracking = False
+        self.tracker = None
+        self.temperature_logger = None
+        self.publisher = None
+        self.roi_coords = None
+
+    def reset(self) -> None:
+        """Сбрасывает усреднение и слежение (например, после нового выделения)"""
+        self.averager.reset()
+        self.tracker = None
+
+    def set_tracking(self, enabled: bool) -> None:
+        """Включает или выключает слежение за нитью"""
+        self.tracker = None
+        self.tracking = enabled
+
+    def process(self, frame: np.ndarray, roi: tuple[int, int, int, int],
+                timestamp: float) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Обрабатывает ROI очередного кадра
+
+        Args:
+            frame: Кадр
+            roi: Выделенная область X1 Y1 X2 Y2 (углы в любом порядке)
+            timestamp: Время захвата кадра по часам clock
+
+        Returns:
+            ROI кадра (после коррекции) и усредненный ROI; у обоих один
+            владелец - вызывающий код, вернуть их нужно через
+            frame_pool.release(). None, если ROI пуст или нить потеряна
+        """
+        x1, y1, x2, y2 = clip_roi(roi, frame.shape)
+        if x1 >= x2 or y1 >= y2:
+            return None
+
+        # Слежение за нитью: сдвигаем ROI вслед за ней, сохраняя размер.
+        # Смещение хранит трекер, выделение пользователя остается прежним
+        if self.tracking:
+            tracker = self.tracker
+            if tracker is None:
+                self.tracker = RoiTracker(frame, x1, y1, x2 - x1, y2 - y1)
+            else:
+                tracker.update(frame)
+                if tracker.lost:
+                    # Нить не найдена: кадр не совмещен с остальными и не попадает в среднее
+                    return None
+                dx, dy = tracker.x - tracker.x0, tracker.y - tracker.y0
+                x1, x2, y1, y2 = x1 + dx, x2 + dx, y1 + dy, y2 + dy
+
+        roi_frame = frame[y1:y2, x1:x2]
+        if roi_frame.size == 0:
+            return None
+
+        # Коррекция темнового кадра и плоского поля только для ROI
+        corrector = self.corrector
+        if corrector is not None:
+            roi_frame = corrector.apply(roi_frame, self.frame_pool.acquire(roi_frame.shape), (y1, x1))
+        else:
+            self.frame_pool.retain(roi_frame)
+
+        average_roi = self.averager.push(roi_frame, self.frame_pool.acquire(roi_frame.shape))
+
+        # Массив координат пересоздаем только при изменении ROI
+        if self.roi_coords is None or tuple(self.roi_coords) != (x1, y1, x2, y2):
+            self.roi_coords = np.array([x1, y1, x2, y2])
+
+        # Ссылки берутся один раз: интерфейс может отключить журнал и трансляцию в любой момент
+        logger = self.temperature_logger
+        if logger is not None:
+            logger.log_frame(average_roi)
+
+        publisher = self.publisher
+        if publisher is not None:
+            publisher.publish_roi(self.camera_index, self.clock() - timestamp, average_roi, self.roi_coords)
+        return roi_frame, average_roi
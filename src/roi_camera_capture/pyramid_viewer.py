@@ -0,0 +1,27 @@
+from pathlib import Path
+import sys
+
+from PyQt6.QtWidgets import QApplication, QFileDialog
+
+from views import ZoomableImageView, PyramidReader
+
+def main():
+    """Просмотр тайловой пирамиды карты температуры"""
+    app = QApplication(sys.argv)
+
+    if len(sys.argv) > 1:
+        directory = sys.argv[1]
+    else:
+        directory = QFileDialog.getExistingDirectory(None, "Выберите каталог пирамиды", "OUTPUT_IMAGES")
+    if not directory:
+        return
+
+    view = ZoomableImageView()
+    view.setWindowTitle(f"Карта температуры: {Path(directory).name}")
+    view.resize(1200, 900)
+    view.show()
+    view.setPyramid(PyramidReader(Path(directory)))
+    sys.exit(app.exec())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+import time
+
+import click
+import numpy as np
+
+from streaming import DEFAULT_ADDRESS, connect, read_message
+
+@click.command()
+@click.option("--address", default=DEFAULT_ADDRESS, help="Адрес трансляции (tcp://host:port или unix:///path)")
+@click.option("--count", default=300, help="Количество принимаемых сообщений")
+@click.option("--max-latency-ms", default=50., help="Допустимый 95-й перцентиль задержки от захвата до приема (мс)")
+@click.option("--verbose", is_flag=True, help="Печатать каждое сообщение")
+def stream_client(address: str, count: int, max_latency_ms: float, verbose: bool):
+    """Тестовый подписчик: принимает сообщения и проверяет задержку"""
+    try:
+        sock = connect(address)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--address")
+    click.echo(f"Connected to {address}")
+
+    end_to_end = []
+    transport = []
+    sequences = []
+    try:
+        for _ in range(count):
+            message = read_message(sock)
+            received = time.time()
+            end_to_end.append(received - message["captured"])
+            transport.append(received - message["sent"])
+            sequences.append(message["seq"])
+            if verbose:
+                frame = message.get("average_roi")
+                click.echo(
+                    f"#{message['seq']} camera={message['camera']} mean={message['mean']:.2f} "
+                    f"temperature={message['temperature']} "
+                    f"frame={None if frame is None else frame.shape}"
+                )
+    except ConnectionError:
+        click.echo("Publisher closed the connection")
+    finally:
+        sock.close()
+
+    if not end_to_end:
+        click.echo("No messages received")
+        sys.exit(1)
+
+    end_to_end = np.array(end_to_end) * 1000
+    transport = np.array(transport) * 1000
+    lost = sequences[-1] - sequences[0] + 1 - len(sequences)
+    click.echo(f"Messages: {len(sequences)}, lost: {lost}")
+    click.echo(
+        f"Capture -> client: mean {end_to_end.mean():.2f} ms, "
+        f"p95 {np.percentile(end_to_end, 95):.2f} ms, max {end_to_end.max():.2f} ms"
+    )
+    click.echo(
+        f"Publish -> client: mean {transport.mean():.2f} ms, "
+        f"p95 {np.percentile(transport, 95):.2f} ms, max {transport.max():.2f} ms"
+    )
+
+    if np.percentile(end_to_end, 95) > max_latency_ms:
+        click.echo(f"FAIL: p95 latency exceeds {max_latency_ms} ms")
+        sys.exit(1)
+    click.echo("OK")
+
+if __name__ == "__main__":
+    stream_client()
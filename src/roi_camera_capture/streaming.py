@@ -0,0 +1,200 @@
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from logging import getLogger as lg
+from pathlib import Path
+
+import msgpack_numpy as mnp
+import numpy as np
+
+from temperature_logger import measure_wire
+from util import import_grad_poly
+
+DEFAULT_ADDRESS = "tcp://127.0.0.1:5557"
+
+# Длина сообщения перед его содержимым (little-endian uint32)
+_HEADER = struct.Struct("<I")
+
+def _is_unix(address: str) -> bool:
+    """Задан ли адрес сокетом Unix (unix:///path)"""
+    return address.startswith("unix://")
+
+def _socket_family(address: str) -> tuple[int, object]:
+    """Семейство сокета и адрес по строке вида tcp://host:port или unix:///path"""
+    if _is_unix(address):
+        # На Windows сокетов Unix в модуле socket нет
+        family = getattr(socket, "AF_UNIX", None)
+        if family is None:
+            raise ValueError(f"Unix sockets are not supported on this platform, use tcp://host:port instead of {address}")
+        return family, address[len("unix://"):]
+    if address.startswith("tcp://"):
+        host, port = address[len("tcp://"):].rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    raise ValueError(f"Unsupported address {address}")
+
+def pack_message(message: dict) -> bytes:
+    """Кадрирование сообщения: длина и msgpack (массивы через msgpack-numpy)"""
+    payload = mnp.packb(message)
+    return _HEADER.pack(len(payload)) + payload
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+def read_message(sock: socket.socket) -> dict:
+    """Читает одно сообщение, отправленное ReadingPublisher"""
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return mnp.unpackb(_recv_exactly(sock, size))
+
+def connect(address: str = DEFAULT_ADDRESS) -> socket.socket:
+    """Подключается к ReadingPublisher"""
+    family, sock_address = _socket_family(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(sock_address)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+class _Subscriber:
+    """Подписчик с собственной очередью и потоком отправки"""
+    def __init__(self, sock: socket.socket, queue_size: int):
+        self.sock = sock
+        self.queue = deque(maxlen=queue_size)
+        self.ready = threading.Event()
+        self.alive = True
+        self.dropped = 0
+
+    def put(self, data: bytes) -> None:
+        # Полная очередь теряет самое старое сообщение, захват не ждет
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(data)
+        self.ready.set()
+
+    def run(self) -> None:
+        try:
+            while self.alive:
+                self.ready.wait()
+                self.ready.clear()
+                while self.queue:
+                    self.sock.sendall(self.queue.popleft())
+        except OSError:
+            pass
+        finally:
+            self.alive = False
+            self.sock.close()
+
+class ReadingPublisher:
+    """
+    Трансляция результатов по кадрам в локальный сокет (TCP или Unix).
+
+    Каждое сообщение - словарь msgpack с длиной впереди: номер, камера,
+    время захвата и отправки, координаты ROI, яркость нити, её разброс
+    и температура (если задана градуировка), по желанию - усредненный ROI.
+    Сообщение упаковывается один раз и кладется в очередь каждого
+    подписчика; отправкой занимается отдельный поток подписчика, поэтому
+    медленный подписчик теряет старые сообщения, но не задерживает захват.
+    """
+    def __init__(self, address: str = DEFAULT_ADDRESS, grad_path: Path | None = None,
+                 include_frames: bool = False, queue_size: int = 64):
+        self.address = address
+        self.grad_poly = import_grad_poly(grad_path) if grad_path is not None else None
+        self.include_frames = include_frames
+        self.queue_size = queue_size
+        self.sequence = 0
+        self._subscribers: list[_Subscriber] = []
+        self._lock = threading.Lock()
+
+        family, sock_address = _socket_family(address)
+        # Файл сокета Unix, удаляется при закрытии
+        self._unix_path = Path(sock_address) if _is_unix(address) else None
+        if self._unix_path is not None:
+            self._unix_path.unlink(missing_ok=True)
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(sock_address)
+        self._server.listen()
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = _Subscriber(sock, self.queue_size)
+            with self._lock:
+                self._subscribers.append(subscriber)
+            threading.Thread(target=subscriber.run, daemon=True).start()
+            lg(__name__).info(f"Subscriber connected to {self.address}")
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish_roi(self, camera: int, frame_age: float,
+                    average_roi: np.ndarray, roi_coords: np.ndarray) -> None:
+        """
+        Отправляет результат кадра всем подписчикам
+
+        Args:
+            camera: Индекс камеры
+            frame_age: Сколько секунд прошло с захвата кадра
+            average_roi: Усредненный ROI
+            roi_coords: Координаты ROI [x1, y1, x2, y2]
+        """
+        if not self._subscribers:
+            return
+
+        mean, std = measure_wire(average_roi)
+        message = {
+            "camera": camera,
+            "captured": time.time() - frame_age,
+            "roi": [int(v) for v in roi_coords],
+            "mean": float(mean),
+            "std": float(std),
+            "temperature": float(self.grad_poly(mean)) if self.grad_poly is not None else None,
+        }
+        if self.include_frames:
+            message["average_roi"] = average_roi
+
+        with self._lock:
+            message["seq"] = self.sequence
+            self.sequence += 1
+            message["sent"] = time.time()
+            data = pack_message(message)
+            self._subscribers = [s for s in self._subscribers if s.alive]
+            for subscriber in self._subscribers:
+                subscriber.put(data)
+
+    def close(self) -> None:
+        """Останавливает трансляцию и отключает подписчиков"""
+        # close() не будит поток, ждущий в accept(), и сокет продолжает слушать
+        try:
+            self._server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server.close()
+        self._accept_thread.join(timeout=1.0)
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.alive = False
+                subscriber.ready.set()
+                try:
+                    subscriber.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self._subscribers = []
+        if self._unix_path is not None:
+            self._unix_path.unlink(missing_ok=True)
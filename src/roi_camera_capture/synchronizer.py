@@ -0,0 +1,95 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+from buffers import FramePool
+
+class FrameSynchronizer:
+    """
+    Сопоставление кадров нескольких камер по ближайшему времени.
+
+    Потоки захвата кладут в синхронизатор кадры с метками общих часов
+    (вместе с усредненным ROI, вычисленным на этом кадре), а match()
+    подбирает для каждой камеры кадр, ближайший к опорному моменту времени.
+
+    Кадры из пула FramePool синхронизатор хранит как владелец (retain) и
+    возвращает пулу, когда они вытесняются из истории. match() по умолчанию
+    отдает копии, которые не зависят от пула.
+    """
+    def __init__(self, camera_indices: list[int], history: int = 32, tolerance: float = 0.05):
+        """
+        Args:
+            camera_indices: Индексы синхронизируемых камер
+            history: Сколько последних кадров хранить для каждой камеры
+            tolerance: Допустимое расхождение меток времени (с)
+        """
+        self.tolerance = tolerance
+        self.history = history
+        self._lock = threading.Lock()
+        self._frames = {index: deque() for index in camera_indices}
+
+    def push(self, camera_index: int, timestamp: float, frame: np.ndarray,
+             average_roi: np.ndarray | None = None, pool: FramePool | None = None) -> None:
+        """
+        Добавляет кадр камеры с меткой времени и усредненным ROI этого кадра (если есть)
+
+        Args:
+            camera_index: Индекс камеры
+            timestamp: Время кадра по общим часам
+            frame: Кадр
+            average_roi: Усредненный ROI, вычисленный на этом кадре
+            pool: Пул, из которого взяты кадр и ROI; синхронизатор становится их владельцем
+        """
+        if pool is not None:
+            pool.retain(frame)
+            pool.retain(average_roi)
+        with self._lock:
+            buffer = self._frames[camera_index]
+            buffer.append((timestamp, frame, average_roi, pool))
+            evicted = buffer.popleft() if len(buffer) > self.history else None
+        if evicted is not None and evicted[3] is not None:
+            evicted[3].release(evicted[1])
+            evicted[3].release(evicted[2])
+
+    def match(self, timestamp: float | None = None,
+              copy: bool = True) -> dict[int, tuple[float, np.ndarray, np.ndarray | None]] | None:
+        """
+        Подбирает для каждой камеры кадр, ближайший к заданному времени
+
+        Args:
+            timestamp: Опорное время. По умолчанию последний кадр самой
+                отстающей камеры, чтобы у остальных уже были кадры рядом
+            copy: Копировать кадры и ROI. Без копирования изображения можно
+                использовать только для меток времени: пул может их перезаписать
+
+        Returns:
+            Словарь {индекс камеры: (время, кадр, усредненный ROI)} или None, если у какой-то
+            камеры нет кадров или расхождение больше tolerance
+        """
+        with self._lock:
+            if any(len(buffer) == 0 for buffer in self._frames.values()):
+                return None
+
+            if timestamp is None:
+                timestamp = min(buffer[-1][0] for buffer in self._frames.values())
+
+            result = {}
+            for index, buffer in self._frames.items():
+                times = np.array([t for t, *_ in buffer])
+                nearest = int(np.argmin(np.abs(times - timestamp)))
+                if abs(times[nearest] - timestamp) > self.tolerance:
+                    return None
+                frame_time, frame, average_roi, _ = buffer[nearest]
+                # Копируем под блокировкой, пока синхронизатор владеет буферами
+                if copy:
+                    frame = frame.copy()
+                    average_roi = None if average_roi is None else average_roi.copy()
+                result[index] = (frame_time, frame, average_roi)
+            return result
+
+    @staticmethod
+    def skew(matched: dict[int, tuple[float, np.ndarray, np.ndarray | None]]) -> float:
+        """Максимальное расхождение меток времени в сопоставленном наборе"""
+        times = [t for t, *_ in matched.values()]
+        return max(times) - min(times)
@@ -0,0 +1,140 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Градуировка и яркость нити считаются так же, как в method_processing
+sys.path.append(str(Path(__file__).resolve().parent.parent / "method_processing"))
+from cmd_grad import wire_brightness
+from util import import_grad_poly
+
+# Формат записи временного ряда на диске
+SERIES_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("mean", "<f4"),
+    ("std", "<f4"),
+    ("temperature", "<f4"),
+])
+
+def measure_wire(roi: np.ndarray, threshold: int = 40) -> tuple[float, float]:
+    """
+    Средняя яркость нити и её разброс для ROI
+
+    Args:
+        roi: ROI кадра (BGR или в оттенках серого)
+        threshold: Порог отсечения фона, как у import_image при построении градуировки
+    """
+    if len(roi.shape) == 3:
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = roi.copy()
+    gray[gray < threshold] = 0
+    return wire_brightness(gray)
+
+def load_series(path: Path) -> np.ndarray:
+    """
+    Загружает временной ряд, записанный TemperatureLogger
+
+    Args:
+        path: Путь к файлу ряда
+
+    Returns:
+        Структурированный массив с полями time, mean, std, temperature
+    """
+    return np.fromfile(path, dtype=SERIES_DTYPE)
+
+class TemperatureLogger:
+    """
+    Журнал температуры нити по кадрам.
+
+    Для каждого кадра считает среднюю яркость нити и её разброс
+    (wire_brightness), переводит яркость в температуру по градуировке
+    и кладёт запись в кольцевой буфер. Буфер сбрасывается на диск
+    пачками по batch_size записей.
+
+    Запись и закрытие защищены блокировкой: журнал можно закрыть из потока
+    интерфейса, пока поток захвата пишет в него, а записи после закрытия
+    отбрасываются.
+    """
+    def __init__(self, grad_path: Path, output_path: Path,
+                 capacity: int = 4096, batch_size: int = 256, threshold: int = 40):
+        if batch_size > capacity:
+            raise ValueError("batch_size must not exceed capacity")
+
+        self.grad_poly = import_grad_poly(grad_path)
+        self.output_path = output_path
+        self.threshold = threshold
+        self.batch_size = batch_size
+
+        self._buffer = np.zeros(capacity, dtype=SERIES_DTYPE)
+        self._written = 0
+        self._flushed = 0
+        self._file = open(output_path, "ab")
+        self._lock = threading.Lock()
+
+    def log_frame(self, roi: np.ndarray, timestamp: float | None = None) -> None:
+        """
+        Добавляет запись для ROI очередного кадра
+
+        Args:
+            roi: ROI кадра (BGR или в оттенках серого)
+            timestamp: Время кадра, по умолчанию текущее
+        """
+        mean, std = measure_wire(roi, self.threshold)
+        self.append(
+            time.time() if timestamp is None else timestamp,
+            mean, std, self.grad_poly(mean)
+        )
+
+    def append(self, timestamp: float, mean: float, std: float, temperature: float) -> None:
+        """Добавляет готовую запись в кольцевой буфер"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._buffer[self._written % len(self._buffer)] = (timestamp, mean, std, temperature)
+            self._written += 1
+
+            if self._written - self._flushed >= self.batch_size:
+                self._flush()
+
+    def recent(self, count: int | None = None) -> np.ndarray:
+        """
+        Возвращает последние записи из кольцевого буфера в порядке времени
+
+        Args:
+            count: Количество записей, по умолчанию все, что есть в буфере
+        """
+        with self._lock:
+            available = min(self._written, len(self._buffer))
+            count = available if count is None else min(count, available)
+            idx = np.arange(self._written - count, self._written) % len(self._buffer)
+            return self._buffer[idx]
+
+    def flush(self) -> None:
+        """Записывает на диск все накопленные и ещё не сохранённые записи"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._file.closed or self._written == self._flushed:
+            return
+
+        capacity = len(self._buffer)
+        start = self._flushed % capacity
+        stop = self._written % capacity
+        if start < stop:
+            self._buffer[start:stop].tofile(self._file)
+        else:
+            self._buffer[start:].tofile(self._file)
+            self._buffer[:stop].tofile(self._file)
+        self._file.flush()
+        self._flushed = self._written
+
+    def close(self) -> None:
+        """Сбрасывает остаток буфера и закрывает файл"""
+        with self._lock:
+            self._flush()
+            self._file.close()
@@ -1,10 +1,15 @@
 import cv2
 import numpy as np
+import threading
+import time
 from collections import deque
+from pathlib import Path
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
-from scipy.interpolate import splprep, splev
+from buffers import AllocationMonitor, FramePool, GcPauseMonitor
+from metrics import PerformanceMetrics
+from pipeline import RoiPipeline, calibration_path, load_corrector
 
 class VideoThread(QThread):
     """
@@ -13,80 +18,189 @@ class VideoThread(QThread):
     Сигналы:
         change_pixmap_signal: Передает кадр видео
         roi_signal: Передает ROI
+
+    Несколько потоков можно запускать одновременно (по одному на камеру):
+    OpenCV отпускает GIL на время захвата и преобразования кадров, поэтому
+    потоки не блокируют друг друга. Общие часы clock задают единую шкалу
+    времени кадров для всех камер.
+
+    Кадры и усредненные ROI берутся из пула FramePool и передаются в поток
+    интерфейса без копирования, поэтому в установившемся режиме кадр не
+    выделяет память под изображения. Получатель изображения из сигнала
+    становится его владельцем и должен вернуть его через release_image(),
+    когда изображение больше не нужно. Паузы GC за последний кадр доступны
+    в frame_gc_pause, а если включен allocation_monitor - объем памяти,
+    выделенной за кадр по данным tracemalloc, в frame_allocated_bytes.
+
+    Время этапов собирается в metrics. Если интерфейс не успевает
+    отображать кадры (в очереди уже max_pending_frames кадров), новые
+    кадры не отправляются на отображение и считаются пропущенными.
+    Получатель change_pixmap_signal должен вызывать frame_delivered().
+
+    Выделенный ROI обрабатывается RoiPipeline (общим с headless):
+    слежение за нитью, коррекция, усреднение, журнал температуры
+    (pipeline.temperature_logger) и трансляция (pipeline.publisher).
+    Если в calibration_dir есть калибровка для этой камеры и текущей
+    экспозиции (см. команду calib), ROI исправляется по темновому кадру
+    и плоскому полю до усреднения.
     """
     change_pixmap_signal = pyqtSignal(np.ndarray)
     roi_signal = pyqtSignal(np.ndarray, np.ndarray)
     average_roi_signal = pyqtSignal(np.ndarray)
     
-    def __init__(self, camera_index=0):
+    def __init__(self, camera_index=0, clock=time.monotonic):
         super().__init__()
         self.camera_index = camera_index
+        self.clock = clock
         self.running = True
         self.drawing = False
         self.start_x, self.start_y = -1, -1
         self.end_x, self.end_y = -1, -1
         self.roi_selected = False
         self.original_frame = None
+        self.timestamp = None
         self.roi = None
         self.average_roi = None
-        self.roi_buffer = deque(np.array([]), maxlen=20)
+        self.roi_coords = None
+        self.frame_pool = FramePool()
+        self._images_lock = threading.Lock()
+        self.pipeline = RoiPipeline(self.frame_pool, camera_index, 20, clock)
+        self.gc_monitor = GcPauseMonitor()
+        self.allocation_monitor = AllocationMonitor()
+        self.frame_allocated_bytes = 0
+        self.frame_gc_pause = 0.0
+        self.frame_synchronizer = None
+        self.calibration_dir = Path("CALIBRATION")
+        self.metrics = PerformanceMetrics()
+        self.max_pending_frames = 2
+        self.emit_times = deque()
     
     def run(self):
         """Основной цикл захвата и обработки видео"""
         cap = cv2.VideoCapture(self.camera_index)
+        frame_shape = None
+        last_capture = None
+        self.gc_monitor.start()
         
         while self.running:
-            ret, frame = cap.read()
+            self.allocation_monitor.begin()
+            gc_pause = self.gc_monitor.total
+
+            # Читаем кадр сразу в свободный буфер пула
+            if frame_shape is None:
+                ret, frame = cap.read()
+            else:
+                ret, frame = cap.read(self.frame_pool.acquire(frame_shape))
             if not ret:
                 continue
+            if frame_shape is None:
+                path = calibration_path(self.calibration_dir, cap, self.camera_index)
+                if path is not None:
+                    self.pipeline.corrector = load_corrector(path, frame.shape)
+            frame_shape = frame.shape
+            timestamp = self.clock()
+
+            now = time.perf_counter()
+            if last_capture is not None:
+                self.metrics.record("capture", now - last_capture)
+            last_capture = now
             
-            # Сохраняем оригинальный кадр для вырезания ROI
-            self.original_frame = frame.copy()
-            
-            # Отправляем кадр для отображения
-            self.change_pixmap_signal.emit(frame)
+            # Сохраняем оригинальный кадр для вырезания ROI (буфер больше не изменяется)
+            self._keep("original_frame", frame)
+            self.timestamp = timestamp
+
+            # Отправляем кадр для отображения, если интерфейс успевает
+            if len(self.emit_times) < self.max_pending_frames:
+                self.emit_times.append(time.perf_counter())
+                self._emit_image(self.change_pixmap_signal, frame)
+            else:
+                self.metrics.dropped_frames += 1
             
             # Если область выделена, обрабатываем её
+            average_roi = None
             if self.roi_selected and self.original_frame is not None:
-                self._process_roi()
+                start = time.perf_counter()
+                average_roi = self._process_roi()
+                self.metrics.record("process", time.perf_counter() - start)
+
+            # Передаем кадр вместе с его усредненным ROI для сопоставления с другими камерами
+            if self.frame_synchronizer is not None:
+                self.frame_synchronizer.push(self.camera_index, timestamp, frame, average_roi, self.frame_pool)
+
+            # Кадр остается у тех, кто его сохранил (original_frame, интерфейс, синхронизатор)
+            self.frame_pool.release(frame)
+
+            self.frame_allocated_bytes = self.allocation_monitor.end()
+            self.frame_gc_pause = self.gc_monitor.total - gc_pause
             
             # Небольшая задержка, чтобы не перегружать CPU
             self.msleep(30)
         
         cap.release()
+        self.gc_monitor.close()
+        self.allocation_monitor.close()
 
-    def _process_roi(self):
-        """Обработка выделенной области интереса (ROI)"""
-        # Определяем координаты прямоугольника в правильном порядке
-        x1, y1 = min(self.start_x, self.end_x), min(self.start_y, self.end_y)
-        x2, y2 = max(self.start_x, self.end_x), max(self.start_y, self.end_y)
-        
-        if self.original_frame is None:
-            return
+    def _process_roi(self) -> np.ndarray | None:
+        """Обработка выделенной области интереса (ROI), возвращает усредненный ROI кадра"""
+        frame = self.original_frame
+        if frame is None:
+            return None
 
-        # Проверяем границы изображения
-        h, w = self.original_frame.shape[:2]
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(w, x2), min(h, y2)
-        
-        # Проверяем, что область имеет размер
-        if x1 < x2 and y1 < y2:
-            # Выделяем выбранную область
-            roi = self.original_frame[y1:y2, x1:x2]
-            
-            # Проверяем, что ROI не пустой
-            if roi.size > 0:
-                # Обработка ROI
-                self.roi_buffer.append(roi.copy())
-                roi_float = [img.astype(np.float32) for img in self.roi_buffer]
-                average_roi = np.array(sum(roi_float) / len(roi_float)).astype(np.uint8)
-                
-                self.roi = roi.copy()
-                self.average_roi = average_roi.copy()
-                
-                # Отправляем сигнал с ROI
-                self.roi_signal.emit(roi, np.array([x1, y1, x2, y2]))
-                self.average_roi_signal.emit(average_roi)
+        result = self.pipeline.process(
+            frame, (self.start_x, self.start_y, self.end_x, self.end_y), self.timestamp
+        )
+        if result is None:
+            return None
+        roi, average_roi = result
+
+        self._keep("roi", roi)
+        self._keep("average_roi", average_roi)
+        self.frame_pool.release(roi)
+        self.frame_pool.release(average_roi)
+        self.roi_coords = self.pipeline.roi_coords
+
+        # Отправляем сигнал с ROI
+        self._emit_image(self.roi_signal, roi, self.roi_coords)
+        self._emit_image(self.average_roi_signal, average_roi)
+        return average_roi
+
+    def _keep(self, name: str, image: np.ndarray) -> None:
+        """Заменяет сохраненное изображение (original_frame, roi, average_roi) с передачей владения"""
+        self.frame_pool.retain(image)
+        with self._images_lock:
+            old = getattr(self, name)
+            setattr(self, name, image)
+        self.frame_pool.release(old)
+
+    def _emit_image(self, signal, image: np.ndarray, *args) -> None:
+        """Отправляет изображение из пула; каждый получатель сигнала становится его владельцем"""
+        for _ in range(self.receivers(signal)):
+            self.frame_pool.retain(image)
+        signal.emit(image, *args)
+
+    def current_images(self) -> tuple[np.ndarray | None, np.ndarray | None, np.ndarray | None]:
+        """
+        Текущие кадр, ROI и усредненный ROI для использования в потоке интерфейса.
+        Каждое изображение нужно вернуть через release_image()
+        """
+        with self._images_lock:
+            images = (self.original_frame, self.roi, self.average_roi)
+            for image in images:
+                self.frame_pool.retain(image)
+        return images
+
+    def release_image(self, image: np.ndarray | None) -> None:
+        """Возвращает изображение, полученное из сигнала или current_images()"""
+        self.frame_pool.release(image)
+
+    def frame_delivered(self) -> None:
+        """Отмечает получение кадра потоком интерфейса и учитывает задержку сигнала"""
+        if self.emit_times:
+            self.metrics.record("latency", time.perf_counter() - self.emit_times.popleft())
+
+    def set_tracking(self, enabled: bool) -> None:
+        """Включает или выключает слежение за нитью"""
+        self.pipeline.set_tracking(enabled)
 
     def handle_mouse_event(self, event_type: str, x: int, y: int) -> None:
         """
@@ -107,7 +221,7 @@ class VideoThread(QThread):
             self.end_x, self.end_y = x, y
         
         elif event_type == "release":
-            self.roi_buffer.clear()
+            self.pipeline.reset()
             self.end_x, self.end_y = x, y
             # Проверяем, что выделена реальная область, а не точка
             if abs(self.end_x - self.start_x) > 5 and abs(self.end_y - self.start_y) > 5:
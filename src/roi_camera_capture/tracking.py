@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+
+class RoiTracker:
+    """
+    Слежение за смещением нити внутри кадра.
+
+    Образец (ROI в момент выделения) ищется в окне поиска вокруг текущего
+    положения: сначала грубо по уменьшенным изображениям, затем точно в
+    исходном разрешении в небольшой окрестности найденной точки. Работает
+    только с окном поиска, а не со всем кадром, поэтому укладывается в
+    доли миллисекунды для типичных размеров ROI.
+
+    Если совпадение с образцом хуже min_score (нить ушла из окна поиска
+    или закрыта), положение не меняется и lost становится True: такой
+    кадр не совмещен с остальными и не должен попадать в среднее.
+    """
+    def __init__(self, frame: np.ndarray, x: int, y: int, w: int, h: int,
+                 search_margin: int = 32, downsample: int = 2, min_score: float = .6):
+        """
+        Args:
+            frame: Кадр, на котором выделен ROI
+            x, y, w, h: Положение и размер ROI
+            search_margin: Максимальное смещение за кадр (пиксели)
+            downsample: Во сколько раз уменьшать изображения для грубого поиска
+            min_score: Минимальная нормированная корреляция с образцом
+        """
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.x0, self.y0 = x, y
+        self.search_margin = search_margin
+        self.downsample = downsample
+        self.min_score = min_score
+        self.score = 1.0
+        self.lost = False
+
+        self.template = self._gray(frame[y:y + h, x:x + w]).copy()
+        self.small_template = self._shrink(self.template)
+
+    @staticmethod
+    def _gray(image: np.ndarray) -> np.ndarray:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+
+    def _shrink(self, image: np.ndarray) -> np.ndarray:
+        h, w = image.shape[:2]
+        size = (max(w // self.downsample, 1), max(h // self.downsample, 1))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def update(self, frame: np.ndarray) -> tuple[int, int]:
+        """
+        Находит новое положение ROI на кадре
+
+        Args:
+            frame: Очередной кадр
+
+        Returns:
+            Новое положение левого верхнего угла ROI (x, y); при потере
+            нити (lost) - прежнее положение
+        """
+        frame_h, frame_w = frame.shape[:2]
+        m = self.search_margin
+        sx1, sy1 = max(self.x - m, 0), max(self.y - m, 0)
+        sx2, sy2 = min(self.x + self.w + m, frame_w), min(self.y + self.h + m, frame_h)
+        search = self._gray(frame[sy1:sy2, sx1:sx2])
+
+        # Грубый поиск по уменьшенным изображениям
+        small_search = self._shrink(search)
+        th, tw = self.small_template.shape[:2]
+        if small_search.shape[0] < th or small_search.shape[1] < tw:
+            self.lost = True
+            return self.x, self.y
+        result = cv2.matchTemplate(small_search, self.small_template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (cx, cy) = cv2.minMaxLoc(result)
+        cx, cy = sx1 + cx * self.downsample, sy1 + cy * self.downsample
+
+        # Уточнение в исходном разрешении рядом с грубой оценкой
+        d = self.downsample
+        rx1, ry1 = max(cx - d, 0), max(cy - d, 0)
+        rx2, ry2 = min(cx + self.w + d, frame_w), min(cy + self.h + d, frame_h)
+        refine = self._gray(frame[ry1:ry2, rx1:rx2])
+        if refine.shape[0] >= self.h and refine.shape[1] >= self.w:
+            result = cv2.matchTemplate(refine, self.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (fx, fy) = cv2.minMaxLoc(result)
+            cx, cy = rx1 + fx, ry1 + fy
+
+        # Плохое совпадение - лучший отклик в шуме, положение не меняем
+        self.score = score
+        self.lost = score < self.min_score
+        if self.lost:
+            return self.x, self.y
+
+        # ROI остается целиком внутри кадра, чтобы не менялся его размер
+        self.x = min(max(cx, 0), frame_w - self.w)
+        self.y = min(max(cy, 0), frame_h - self.h)
+        return self.x, self.y
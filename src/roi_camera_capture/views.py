@@ -1,7 +1,11 @@
 import cv2
 import numpy as np
 import os
+import sys
+import math
+from collections import OrderedDict
 from datetime import datetime
+from pathlib import Path
 import csv
 
 from PyQt6.QtWidgets import (
@@ -17,9 +21,18 @@ from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 import matplotlib.pyplot as plt
 from matplotlib.widgets import SpanSelector
 
+# Формат тайловой пирамиды общий с method_processing
+sys.path.append(str(Path(__file__).resolve().parent.parent / "method_processing"))
+from pyramid import PyramidReader
+
 class ZoomableImageView(QGraphicsView):
     """
     Виджет для отображения изображения с возможностью масштабирования и выделения ROI.
+
+    Помимо обычного изображения (setImage) умеет показывать тайловую
+    пирамиду (setPyramid): загружаются только тайлы видимой области
+    уровня, соответствующего текущему масштабу, а готовые тайлы хранятся
+    в LRU-кэше ограниченного размера.
     
     Сигналы:
         mouse_pressed: Сигнализирует о нажатии кнопки мыши (x, y)
@@ -61,6 +74,8 @@ class ZoomableImageView(QGraphicsView):
         # Масштаб
         self.zoom_factor = 1.15
         self.current_zoom = 1.0
+        self.min_zoom = 0.1
+        self.max_zoom = 10.0
         self.first_image_loaded = False
         
         # Переменные для рисования прямоугольника
@@ -74,6 +89,12 @@ class ZoomableImageView(QGraphicsView):
         
         # Изображение
         self.pixmap_item = None
+
+        # Тайловая пирамида
+        self.pyramid = None
+        self.tile_items = {}
+        self.tile_cache = OrderedDict()
+        self.tile_cache_size = 256
         
         # Запоминаем текущую трансформацию
         self.current_transform = self.transform()
@@ -107,6 +128,9 @@ class ZoomableImageView(QGraphicsView):
         
         # Очищаем сцену и добавляем новое изображение
         self._scene.clear()
+        self.pyramid = None
+        self.tile_items = {}
+        self.max_zoom = 10.0
         self.pixmap_item = self._scene.addPixmap(pixmap)
         self._scene.setSceneRect(QRectF(0, 0, w, h))
         
@@ -119,8 +143,102 @@ class ZoomableImageView(QGraphicsView):
             # Восстанавливаем предыдущую трансформацию
             self.setTransform(old_transform)
     
+    def setPyramid(self, pyramid: PyramidReader) -> None:
+        """
+        Переключает виджет в режим просмотра тайловой пирамиды
+
+        Args:
+            pyramid: Пирамида, сохраненная export_pyramid
+        """
+        self._scene.clear()
+        self.pixmap_item = None
+        self.pyramid = pyramid
+        self.tile_items = {}
+        self.tile_cache.clear()
+
+        h, w = pyramid.shape
+        self._scene.setSceneRect(QRectF(0, 0, w, h))
+        self.resetTransform()
+        self.fitInView(self._scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+        self.current_zoom = 1.0
+        # Разрешаем приблизиться до 10 экранных пикселей на пиксель карты
+        self.max_zoom = max(10.0, 10.0 / self.transform().m11())
+        self.first_image_loaded = True
+        self._update_tiles()
+
+    def _has_content(self) -> bool:
+        """Есть ли что показывать (изображение или пирамида)"""
+        return self.pixmap_item is not None or self.pyramid is not None
+
+    def _tile_pixmap(self, level: int, ty: int, tx: int) -> QPixmap:
+        """Тайл в виде QPixmap с цветовой картой, через LRU-кэш"""
+        key = (level, ty, tx)
+        pixmap = self.tile_cache.get(key)
+        if pixmap is not None:
+            self.tile_cache.move_to_end(key)
+            return pixmap
+
+        tile = self.pyramid.tile(level, ty, tx)
+        span = max(self.pyramid.max - self.pyramid.min, 1e-12)
+        normalized = np.clip((tile - self.pyramid.min) * (255 / span), 0, 255).astype(np.uint8)
+        colored = cv2.applyColorMap(normalized, cv2.COLORMAP_HOT)
+        h, w = normalized.shape
+        pixmap = QPixmap.fromImage(QImage(colored.data, w, h, 3 * w, QImage.Format.Format_BGR888))
+
+        self.tile_cache[key] = pixmap
+        if len(self.tile_cache) > self.tile_cache_size:
+            self.tile_cache.popitem(last=False)
+        return pixmap
+
+    def _update_tiles(self) -> None:
+        """Показывает тайлы видимой области для текущего масштаба"""
+        if self.pyramid is None:
+            return
+        viewport = self.viewport()
+        if viewport is None:
+            return
+
+        # Уровень, на котором один пиксель тайла примерно равен пикселю экрана
+        scale = self.transform().m11()
+        level = int(math.floor(math.log2(1 / scale))) if scale > 0 else 0
+        level = min(max(level, 0), len(self.pyramid.levels) - 1)
+        factor = 2 ** level
+        span = self.pyramid.tile_size * factor
+
+        rows, cols = self.pyramid.grid(level)
+        visible = self.mapToScene(viewport.rect()).boundingRect()
+        ty1, ty2 = max(int(visible.top() // span), 0), min(int(visible.bottom() // span), rows - 1)
+        tx1, tx2 = max(int(visible.left() // span), 0), min(int(visible.right() // span), cols - 1)
+
+        needed = {
+            (level, ty, tx)
+            for ty in range(ty1, ty2 + 1)
+            for tx in range(tx1, tx2 + 1)
+        }
+
+        for key in list(self.tile_items):
+            if key not in needed:
+                self._scene.removeItem(self.tile_items.pop(key))
+
+        for key in needed:
+            if key in self.tile_items:
+                continue
+            _, ty, tx = key
+            item = self._scene.addPixmap(self._tile_pixmap(*key))
+            item.setPos(tx * span, ty * span)
+            item.setScale(factor)
+            self.tile_items[key] = item
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self._update_tiles()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_tiles()
+
     def wheelEvent(self, event):
-        if self.pixmap_item is None or event is None:
+        if not self._has_content() or event is None:
             return
         
         # Определяем направление и коэффициент масштабирования
@@ -128,21 +246,22 @@ class ZoomableImageView(QGraphicsView):
         self.current_zoom *= factor
         
         # Ограничение масштаба
-        if self.current_zoom > 10.0:
-            factor = 10.0 / (self.current_zoom / factor)
-            self.current_zoom = 10.0
-        elif self.current_zoom < 0.1:
-            factor = 0.1 / (self.current_zoom / factor)
-            self.current_zoom = 0.1
+        if self.current_zoom > self.max_zoom:
+            factor = self.max_zoom / (self.current_zoom / factor)
+            self.current_zoom = self.max_zoom
+        elif self.current_zoom < self.min_zoom:
+            factor = self.min_zoom / (self.current_zoom / factor)
+            self.current_zoom = self.min_zoom
         
         # Применяем масштабирование
         self.scale(factor, factor)
         
         # Сохраняем текущую трансформацию
         self.current_transform = self.transform()
+        self._update_tiles()
     
     def mousePressEvent(self, event):
-        if not self.pixmap_item or event is None:
+        if not self._has_content() or event is None:
             return super().mousePressEvent(event)
         
         if event.button() == Qt.MouseButton.LeftButton:
@@ -245,6 +364,38 @@ class ZoomableImageView(QGraphicsView):
             painter.drawRect(x, y, width, height)
             painter.end()
 
+def minmax_decimate(x: np.ndarray, y: np.ndarray, n_buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Прореживание ряда по схеме min/max: в каждой из n_buckets корзин
+    остаются только минимальная и максимальная точки, поэтому огибающая
+    графика не меняется.
+
+    Args:
+        x: Отсортированные значения по оси X
+        y: Значения по оси Y
+        n_buckets: Количество корзин (обычно ширина графика в пикселях)
+
+    Returns:
+        Прореженные массивы x и y
+    """
+    n = len(x)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return x, y
+
+    size = n // n_buckets
+    m = size * n_buckets
+    blocks = y[:m].reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    indices = [blocks.argmin(axis=1) + offsets, blocks.argmax(axis=1) + offsets]
+
+    # Хвост, не поместившийся в целые корзины
+    if m < n:
+        tail = y[m:]
+        indices.append(np.array([m + tail.argmin(), m + tail.argmax()]))
+
+    idx = np.unique(np.concatenate(indices))
+    return x[idx], y[idx]
+
 class MatplotlibCanvas(FigureCanvasQTAgg):
     """Canvas для отображения графиков matplotlib"""
     def __init__(self, parent=None, width=5, height=4, dpi=100, xlabel="X", ylabel="Y"):
@@ -259,13 +410,43 @@ class MatplotlibCanvas(FigureCanvasQTAgg):
         self.ax.grid(True)
 
 class GraphApp(QWidget):
-    """Виджет для отображения и анализа графиков"""
-    def __init__(self, xlabel="X", ylabel="Y"):
+    """
+    Виджет для отображения и анализа графиков.
+
+    Данные хранятся в растущих буферах, а на холст выводится только
+    прореженная (min/max) версия видимого участка, которая пересчитывается
+    при изменении масштаба. Для каждого полного блока из block_size точек
+    заранее запоминаются положения минимума и максимума, поэтому
+    прореживание длинного участка идет по блокам, а не по всем точкам,
+    а добавление точек обрабатывает только новые данные.
+    """
+    # Количество корзин, если ширину холста определить не удалось
+    default_buckets = 2000
+    # Размер блока с заранее найденными минимумом и максимумом
+    block_size = 1024
+
+    def __init__(self, xlabel="X", ylabel="Y", ylim: tuple[float, float] | None = (0, 255)):
+        """
+        Args:
+            xlabel: Подпись оси X
+            ylabel: Подпись оси Y
+            ylim: Пределы оси Y (по умолчанию шкала 8-битной яркости),
+                None - подбирать по данным
+        """
         super().__init__()
+        self.ylim = ylim
         
-        # Данные графика
-        self.x_data = np.array([])
-        self.y_data = np.array([])
+        # Данные графика (буферы с запасом, заполнены первые _size элементов)
+        self._x_buffer = np.empty(0, dtype=np.float64)
+        self._y_buffer = np.empty(0, dtype=np.float64)
+        self._size = 0
+
+        # Индексы минимума и максимума каждого полного блока и пределы по Y
+        self._block_min = np.empty(0, dtype=np.int64)
+        self._block_max = np.empty(0, dtype=np.int64)
+        self._blocks = 0
+        self._y_min = np.inf
+        self._y_max = -np.inf
         
         # Сохраняем метки осей
         self.xlabel = xlabel
@@ -313,6 +494,53 @@ class GraphApp(QWidget):
             interactive=True,
             drag_from_anywhere=True
         )
+
+        # Пересчитываем прореживание при масштабировании и перемещении
+        self.canvas.ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    @property
+    def x_data(self) -> np.ndarray:
+        """Данные по оси X (отсортированы по возрастанию)"""
+        return self._x_buffer[:self._size]
+
+    @property
+    def y_data(self) -> np.ndarray:
+        """Данные по оси Y"""
+        return self._y_buffer[:self._size]
+
+    def _reserve(self, capacity: int) -> None:
+        """Увеличивает буферы минимум до capacity элементов (с удвоением)"""
+        if capacity <= len(self._x_buffer):
+            return
+        new_capacity = max(capacity, 2 * len(self._x_buffer), 1024)
+        x_buffer = np.empty(new_capacity, dtype=np.float64)
+        y_buffer = np.empty(new_capacity, dtype=np.float64)
+        x_buffer[:self._size] = self.x_data
+        y_buffer[:self._size] = self.y_data
+        self._x_buffer, self._y_buffer = x_buffer, y_buffer
+
+        n_blocks = new_capacity // self.block_size + 1
+        block_min = np.empty(n_blocks, dtype=np.int64)
+        block_max = np.empty(n_blocks, dtype=np.int64)
+        block_min[:self._blocks] = self._block_min[:self._blocks]
+        block_max[:self._blocks] = self._block_max[:self._blocks]
+        self._block_min, self._block_max = block_min, block_max
+
+    def _update_index(self, start: int) -> None:
+        """Учитывает точки, начиная с start: пределы по Y и новые полные блоки"""
+        if start < self._size:
+            new_y = self._y_buffer[start:self._size]
+            self._y_min = min(self._y_min, new_y.min())
+            self._y_max = max(self._y_max, new_y.max())
+
+        blocks = self._size // self.block_size
+        if blocks > self._blocks:
+            b = self.block_size
+            y = self._y_buffer[self._blocks * b:blocks * b].reshape(-1, b)
+            offsets = np.arange(self._blocks, blocks) * b
+            self._block_min[self._blocks:blocks] = y.argmin(axis=1) + offsets
+            self._block_max[self._blocks:blocks] = y.argmax(axis=1) + offsets
+            self._blocks = blocks
     
     def update_plot(self, x_data: np.ndarray, y_data: np.ndarray) -> None:
         """
@@ -322,15 +550,104 @@ class GraphApp(QWidget):
             x_data: Данные по оси X
             y_data: Данные по оси Y
         """
-        self.x_data = x_data
-        self.y_data = y_data
-        
-        # Обновление графика
-        self.canvas.line.set_data(self.x_data, self.y_data)
-        self.canvas.ax.relim()
-        self.canvas.ax.set_ylim(0, 255)
-        self.canvas.ax.autoscale_view(True, True, True)
-        self.canvas.draw()
+        x_data = np.asarray(x_data, dtype=np.float64).ravel()
+        y_data = np.asarray(y_data, dtype=np.float64).ravel()
+
+        # Поиск диапазонов идет по отсортированному X
+        if len(x_data) > 1 and np.any(np.diff(x_data) < 0):
+            order = np.argsort(x_data, kind='stable')
+            x_data, y_data = x_data[order], y_data[order]
+
+        self._size = 0
+        self._blocks = 0
+        self._y_min, self._y_max = np.inf, -np.inf
+        self._reserve(len(x_data))
+        self._x_buffer[:len(x_data)] = x_data
+        self._y_buffer[:len(y_data)] = y_data
+        self._size = len(x_data)
+        self._update_index(0)
+
+        self._redraw(autoscale=True)
+
+    def append_data(self, x_data: np.ndarray, y_data: np.ndarray) -> None:
+        """
+        Добавление точек в конец ряда без копирования уже накопленных данных
+        
+        Args:
+            x_data: Новые данные по оси X (не меньше последнего значения)
+            y_data: Новые данные по оси Y
+        """
+        x_data = np.atleast_1d(np.asarray(x_data, dtype=np.float64))
+        y_data = np.atleast_1d(np.asarray(y_data, dtype=np.float64))
+        if len(x_data) == 0:
+            return
+        if self._size > 0 and x_data[0] < self._x_buffer[self._size - 1]:
+            self.update_plot(np.concatenate([self.x_data, x_data]),
+                             np.concatenate([self.y_data, y_data]))
+            return
+
+        start = self._size
+        self._reserve(self._size + len(x_data))
+        self._x_buffer[self._size:self._size + len(x_data)] = x_data
+        self._y_buffer[self._size:self._size + len(y_data)] = y_data
+        self._size += len(x_data)
+        self._update_index(start)
+
+        self._redraw(autoscale=True)
+
+    def _bucket_count(self) -> int:
+        """Количество корзин прореживания по ширине осей в пикселях"""
+        width = int(self.canvas.ax.bbox.width)
+        return width if width > 0 else self.default_buckets
+
+    def _envelope(self, lo: int, hi: int) -> np.ndarray:
+        """
+        Индексы точек участка [lo, hi), сохраняющие его огибающую: края
+        участка целиком, а полные блоки внутри - только минимумом и максимумом
+        """
+        b = self.block_size
+        first, last = -(-lo // b), min(hi // b, self._blocks)
+        if last - first < 2:
+            return np.arange(lo, hi)
+        return np.concatenate([
+            np.arange(lo, first * b),
+            np.sort(np.concatenate([self._block_min[first:last], self._block_max[first:last]])),
+            np.arange(last * b, hi),
+        ])
+
+    def _set_decimated_line(self) -> None:
+        """Выводит на холст прореженный видимый участок ряда"""
+        x, y = self.x_data, self.y_data
+        if len(x) > 0:
+            x_min, x_max = sorted(self.canvas.ax.get_xlim())
+            # Берем по одной точке за краями, чтобы линия не обрывалась
+            lo = max(np.searchsorted(x, x_min, side='left') - 1, 0)
+            hi = min(np.searchsorted(x, x_max, side='right') + 1, len(x))
+            idx = self._envelope(lo, hi)
+            x, y = minmax_decimate(x[idx], y[idx], self._bucket_count())
+        self.canvas.line.set_data(x, y)
+
+    def _redraw(self, autoscale: bool = False) -> None:
+        """Перерисовка графика"""
+        if autoscale and self._size > 0:
+            # Пределы осей известны без обхода данных: X отсортирован, Y отслеживается при добавлении
+            ax = self.canvas.ax
+            ax.dataLim.set_points(np.array([
+                [self._x_buffer[0], self._y_min],
+                [self._x_buffer[self._size - 1], self._y_max],
+            ]))
+            ax.ignore_existing_data_limits = False
+            # Заданные пределы Y отключают автомасштаб по Y, как и раньше
+            if self.ylim is not None:
+                ax.set_ylim(*self.ylim)
+            ax.autoscale_view(True, True, True)
+        self._set_decimated_line()
+        self.canvas.draw_idle()
+
+    def _on_xlim_changed(self, ax) -> None:
+        """Обработка изменения видимого диапазона по оси X"""
+        self._set_decimated_line()
+        self.canvas.draw_idle()
     
     def save_as_image(self):
         """Сохранение графика как изображения"""
@@ -368,8 +685,7 @@ class GraphApp(QWidget):
             with open(filename, 'w', newline='') as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow([self.xlabel, self.ylabel])
-                for x, y in zip(self.x_data, self.y_data):
-                    writer.writerow([x, y])
+                writer.writerows(zip(self.x_data.tolist(), self.y_data.tolist()))
             
             self.status_label.setText(f"Данные сохранены как {os.path.basename(filename)}")
     
@@ -384,20 +700,20 @@ class GraphApp(QWidget):
         if len(self.x_data) == 0 or len(self.y_data) == 0:
             return
             
-        # Находим индексы данных в выбранном диапазоне
-        indices = [i for i, x in enumerate(self.x_data) if min_val <= x <= max_val]
+        # Находим границы выбранного диапазона бинарным поиском по отсортированному X
+        lo = np.searchsorted(self.x_data, min_val, side='left')
+        hi = np.searchsorted(self.x_data, max_val, side='right')
         
-        if not indices:
+        if lo >= hi:
             self.status_label.setText("В выбранном диапазоне нет данных")
             return
             
         # Рассчитываем среднее значение y в выбранном диапазоне
-        selected_y_values = [self.y_data[i] for i in indices]
-        mean_value = sum(selected_y_values) / len(selected_y_values)
+        mean_value = self.y_data[lo:hi].mean()
         
         # Показываем информацию в статусной строке
         self.status_label.setText(
             f"Диапазон X: [{min_val:.4f}, {max_val:.4f}], "
             f"Среднее значение {self.ylabel}: {mean_value:.4f}, "
-            f"Количество точек: {len(indices)}"
+            f"Количество точек: {hi - lo}"
         )
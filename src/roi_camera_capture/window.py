@@ -2,17 +2,44 @@ import cv2
 import numpy as np
 import os
 from datetime import datetime
+from pathlib import Path
 from PIL import Image
 
+import time
+
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QFileDialog, QComboBox
 )
-from PyQt6.QtCore import pyqtSlot, Qt
+from PyQt6.QtCore import pyqtSlot, Qt, QTimer
 
 from threads import VideoThread
+from temperature_logger import TemperatureLogger
+from synchronizer import FrameSynchronizer
+from streaming import ReadingPublisher, DEFAULT_ADDRESS
 from views import ZoomableImageView
 
+def get_available_cameras():
+    """Получает список доступных камер"""
+    camera_names = []
+    
+    # Проверяем до 5 возможных камер
+    for i in range(5):
+        cap = cv2.VideoCapture(i)
+        if cap.isOpened():
+            # Пытаемся получить имя устройства (не всегда доступно)
+            # В некоторых системах можно использовать cap.get(cv2.CAP_PROP_DEVICE_NAME)
+            camera_names.append(f"Камера {i}")
+            cap.release()
+        else:
+            break
+    
+    # Если не найдено ни одной камеры, добавляем заглушку
+    if not camera_names:
+        camera_names.append("Камера не найдена")
+    
+    return camera_names
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -57,6 +84,25 @@ class MainWindow(QMainWindow):
         self.save_all_button = QPushButton("Сохранить все изображения")
         self.save_all_button.clicked.connect(self.save_all_images)
         button_layout.addWidget(self.save_all_button)
+
+        # Кнопка для записи температуры нити во времени
+        self.temperature_logger = None
+        self.log_button = QPushButton("Начать запись температуры")
+        self.log_button.clicked.connect(self.toggle_temperature_log)
+        button_layout.addWidget(self.log_button)
+
+        # Трансляция результатов в локальный сокет
+        self.publisher = None
+        self.stream_button = QPushButton("Трансляция")
+        self.stream_button.setCheckable(True)
+        self.stream_button.toggled.connect(self.toggle_streaming)
+        button_layout.addWidget(self.stream_button)
+
+        # Слежение за смещением нити
+        self.tracking_button = QPushButton("Слежение за нитью")
+        self.tracking_button.setCheckable(True)
+        self.tracking_button.toggled.connect(self.toggle_tracking)
+        button_layout.addWidget(self.tracking_button)
         
         top_layout.addWidget(button_panel)
         camera_layout.addWidget(top_panel)
@@ -76,6 +122,24 @@ class MainWindow(QMainWindow):
 
         camera_layout.addWidget(bottom_panel)
                         
+        # Панель производительности (скрыта по умолчанию)
+        self.metrics_label = QLabel()
+        self.metrics_label.setVisible(False)
+        top_layout.addWidget(self.metrics_label)
+
+        self.metrics_button = QPushButton("Производительность")
+        self.metrics_button.setCheckable(True)
+        self.metrics_button.toggled.connect(self.toggle_metrics)
+        button_layout.addWidget(self.metrics_button)
+
+        self.export_metrics_button = QPushButton("Сохранить метрики")
+        self.export_metrics_button.clicked.connect(self.export_metrics)
+        button_layout.addWidget(self.export_metrics_button)
+
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_metrics)
+        self.metrics_timer.start(500)
+
         # Статус бар
         self.status_bar = self.statusBar()
         if self.status_bar is not None:
@@ -94,24 +158,7 @@ class MainWindow(QMainWindow):
     
     def get_available_cameras(self):
         """Получает список доступных камер"""
-        camera_names = []
-        
-        # Проверяем до 5 возможных камер
-        for i in range(5):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                # Пытаемся получить имя устройства (не всегда доступно)
-                # В некоторых системах можно использовать cap.get(cv2.CAP_PROP_DEVICE_NAME)
-                camera_names.append(f"Камера {i}")
-                cap.release()
-            else:
-                break
-        
-        # Если не найдено ни одной камеры, добавляем заглушку
-        if not camera_names:
-            camera_names.append("Камера не найдена")
-        
-        return camera_names
+        return get_available_cameras()
     
     def camera_changed(self, index: int):
         """Обработчик изменения выбранной камеры"""
@@ -130,6 +177,10 @@ class MainWindow(QMainWindow):
         self.video_thread.change_pixmap_signal.connect(self.update_video)
         self.video_thread.roi_signal.connect(self.update_roi)
         self.video_thread.average_roi_signal.connect(self.update_average_roi)
+        self.video_thread.pipeline.temperature_logger = self.temperature_logger
+        self.video_thread.set_tracking(self.tracking_button.isChecked())
+        self.video_thread.pipeline.publisher = self.publisher
+        self.video_thread.allocation_monitor.enabled = self.metrics_button.isChecked()
         self.video_thread.start()
         if self.status_bar is not None:
             self.status_bar.showMessage(f"Переключение на камеру {index}: {self.available_cameras[index]}")
@@ -137,25 +188,66 @@ class MainWindow(QMainWindow):
     @pyqtSlot(np.ndarray)
     def update_video(self, cv_img: np.ndarray):
         """Обновляем изображение с камеры"""
+        self.video_thread.frame_delivered()
+        start = time.perf_counter()
         self.video_view.setImage(cv_img)
+        self.video_thread.metrics.record("display", time.perf_counter() - start)
+        # setImage копирует изображение в QPixmap, буфер можно вернуть пулу
+        self.video_thread.release_image(cv_img)
+
+    def toggle_metrics(self, enabled: bool):
+        """Показывает панель производительности и включает учет выделений памяти"""
+        self.metrics_label.setVisible(enabled)
+        self.video_thread.allocation_monitor.enabled = enabled
+
+    def update_metrics(self):
+        """Обновляем панель производительности"""
+        if self.metrics_label.isVisible():
+            self.metrics_label.setText(self.video_thread.metrics.status_text())
+
+    def export_metrics(self):
+        """Сохранение журнала метрик производительности"""
+        timestamp = datetime.now().strftime(r"%Y-%m-%d_%H-%M-%S")
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить метрики", f"metrics_{timestamp}.csv",
+            "CSV файлы (*.csv);;JSON файлы (*.json)"
+        )
+        if filename:
+            self.video_thread.metrics.export(Path(filename))
+            if self.status_bar is not None:
+                self.status_bar.showMessage(f"Метрики сохранены в {filename}", 5000)
     
     @pyqtSlot(np.ndarray, np.ndarray)
     def update_roi(self, roi: np.ndarray, xyl: np.ndarray):
         """Обновляем ROI и отправляем данные для анализа"""
         self.roi_view.setImage(roi)
+        self.video_thread.release_image(roi)
         if self.status_bar is not None:
-            self.status_bar.showMessage(f"Выделена область: x={xyl[0]}:{xyl[2]}, y={xyl[1]}:{xyl[3]}")
+            self.status_bar.showMessage(
+                f"Выделена область: x={xyl[0]}:{xyl[2]}, y={xyl[1]}:{xyl[3]} | "
+                + (f"Выделено памяти за кадр: {self.video_thread.frame_allocated_bytes} байт, "
+                   if self.video_thread.allocation_monitor.enabled else "")
+                + f"паузы GC: {self.video_thread.frame_gc_pause * 1000:.2f} мс"
+            )
     
     @pyqtSlot(np.ndarray)
     def update_average_roi(self, roi: np.ndarray):
         """Обновляем ROI и отправляем данные для анализа"""
         self.average_roi_view.setImage(roi)
+        self.video_thread.release_image(roi)
 
     def save_all_images(self):
         """Сохранить все изображения с одним базовым именем"""
-        if (self.video_thread.original_frame is None or 
-            self.video_thread.roi is None or 
-            self.video_thread.average_roi is None):
+        # Изображения удерживаются, чтобы поток захвата не перезаписал их во время сохранения
+        images = self.video_thread.current_images()
+        try:
+            self._save_images(*images)
+        finally:
+            for image in images:
+                self.video_thread.release_image(image)
+
+    def _save_images(self, original_frame, roi, average_roi):
+        if original_frame is None or roi is None or average_roi is None:
             if self.status_bar is not None:
                 self.status_bar.showMessage(f"Нет изображений для сохранения", 5000)
             return
@@ -173,18 +265,79 @@ class MainWindow(QMainWindow):
         
         if filename:
             Image.fromarray(cv2.cvtColor(
-                self.video_thread.original_frame, cv2.COLOR_BGR2RGB
+                original_frame, cv2.COLOR_BGR2RGB
             )).save(f"{filename}_orig.png")
             Image.fromarray(cv2.cvtColor(
-                self.video_thread.roi, cv2.COLOR_BGR2RGB
+                roi, cv2.COLOR_BGR2RGB
             )).save(f"{filename}_roi.png")
             Image.fromarray(cv2.cvtColor(
-                self.video_thread.average_roi, cv2.COLOR_BGR2RGB
+                average_roi, cv2.COLOR_BGR2RGB
             )).save(f"{filename}_av_roi.png")
 
             if self.status_bar is not None:
                 self.status_bar.showMessage(f"Все изображения сохранены с базовым именем {filename}", 5000)
     
+    def toggle_streaming(self, enabled: bool):
+        """Включает или выключает трансляцию результатов подписчикам"""
+        if not enabled:
+            self.video_thread.pipeline.publisher = None
+            if self.publisher is not None:
+                self.publisher.close()
+                self.publisher = None
+            return
+
+        # Градуировка необязательна: без неё транслируется только яркость
+        grad_path, _ = QFileDialog.getOpenFileName(
+            self, "Выберите файл градуировки (необязательно)", "GRADUATION",
+            "Градуировки (*.grad);;Все файлы (*)"
+        )
+        try:
+            self.publisher = ReadingPublisher(DEFAULT_ADDRESS, Path(grad_path) if grad_path else None)
+        except (OSError, ValueError) as e:
+            if self.status_bar is not None:
+                self.status_bar.showMessage(f"Не удалось начать трансляцию: {e}", 5000)
+            self.stream_button.setChecked(False)
+            return
+
+        self.video_thread.pipeline.publisher = self.publisher
+        if self.status_bar is not None:
+            self.status_bar.showMessage(f"Трансляция на {DEFAULT_ADDRESS}", 5000)
+
+    def toggle_tracking(self, enabled: bool):
+        """Включает или выключает слежение за нитью"""
+        self.video_thread.set_tracking(enabled)
+
+    def toggle_temperature_log(self):
+        """Включает или выключает запись температуры нити"""
+        if self.temperature_logger is not None:
+            self.video_thread.pipeline.temperature_logger = None
+            self.temperature_logger.close()
+            if self.status_bar is not None:
+                self.status_bar.showMessage(
+                    f"Запись температуры сохранена в {self.temperature_logger.output_path}", 5000
+                )
+            self.temperature_logger = None
+            self.log_button.setText("Начать запись температуры")
+            return
+
+        grad_path, _ = QFileDialog.getOpenFileName(
+            self, "Выберите файл градуировки", "GRADUATION",
+            "Градуировки (*.grad);;Все файлы (*)"
+        )
+        if not grad_path:
+            return
+
+        timestamp = datetime.now().strftime(r"%Y-%m-%d_%H-%M-%S")
+        directory = Path("logs")
+        directory.mkdir(exist_ok=True)
+        output_path = directory / f"temperature_{timestamp}.bin"
+
+        self.temperature_logger = TemperatureLogger(Path(grad_path), output_path)
+        self.video_thread.pipeline.temperature_logger = self.temperature_logger
+        self.log_button.setText("Остановить запись температуры")
+        if self.status_bar is not None:
+            self.status_bar.showMessage(f"Запись температуры в {output_path}", 5000)
+
     def on_mouse_pressed(self, x, y):
         """Обработчик нажатия кнопки мыши на видео"""
         self.video_thread.handle_mouse_event("press", x, y)
@@ -207,4 +360,178 @@ class MainWindow(QMainWindow):
         if a0 is None:
             return
         self.video_thread.stop()
+        if self.temperature_logger is not None:
+            self.temperature_logger.close()
+        if self.publisher is not None:
+            self.publisher.close()
+        a0.accept()
+
+class CameraPanel(QWidget):
+    """Видео, ROI и усредненный ROI одной камеры со своим потоком захвата"""
+    def __init__(self, camera_index: int, camera_name: str, clock, synchronizer: FrameSynchronizer):
+        super().__init__()
+        layout = QVBoxLayout(self)
+
+        title = QLabel(f"{camera_index}: {camera_name}")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+
+        self.video_view = ZoomableImageView()
+        self.video_view.setMinimumSize(400, 300)
+        layout.addWidget(self.video_view)
+
+        roi_layout = QHBoxLayout()
+        self.roi_view = ZoomableImageView()
+        self.roi_view.setMinimumSize(200, 150)
+        roi_layout.addWidget(self.roi_view)
+        self.average_roi_view = ZoomableImageView()
+        self.average_roi_view.setMinimumSize(200, 150)
+        roi_layout.addWidget(self.average_roi_view)
+        layout.addLayout(roi_layout)
+
+        # У каждой камеры свой ROI и свое усреднение
+        self.video_thread = VideoThread(camera_index, clock=clock)
+        self.video_thread.frame_synchronizer = synchronizer
+        self.video_thread.change_pixmap_signal.connect(self.update_video)
+        self.video_thread.roi_signal.connect(self.update_roi)
+        self.video_thread.average_roi_signal.connect(self.update_average_roi)
+
+        self.video_view.mouse_pressed.connect(
+            lambda x, y: self.video_thread.handle_mouse_event("press", x, y))
+        self.video_view.mouse_moved.connect(
+            lambda x, y: self.video_thread.handle_mouse_event("move", x, y))
+        self.video_view.mouse_released.connect(
+            lambda x, y: self.video_thread.handle_mouse_event("release", x, y))
+
+    @pyqtSlot(np.ndarray)
+    def update_video(self, cv_img: np.ndarray):
+        """Обновляем изображение с камеры"""
+        self.video_thread.frame_delivered()
+        start = time.perf_counter()
+        self.video_view.setImage(cv_img)
+        self.video_thread.metrics.record("display", time.perf_counter() - start)
+        # setImage копирует изображение в QPixmap, буфер можно вернуть пулу
+        self.video_thread.release_image(cv_img)
+
+    @pyqtSlot(np.ndarray, np.ndarray)
+    def update_roi(self, roi: np.ndarray, xyl: np.ndarray):
+        """Обновляем ROI"""
+        self.roi_view.setImage(roi)
+        self.video_thread.release_image(roi)
+
+    @pyqtSlot(np.ndarray)
+    def update_average_roi(self, roi: np.ndarray):
+        """Обновляем усредненный ROI"""
+        self.average_roi_view.setImage(roi)
+        self.video_thread.release_image(roi)
+
+class MultiCameraWindow(QMainWindow):
+    """
+    Одновременный захват со всех камер.
+
+    Потоки камер работают параллельно и ставят метки времени по общим
+    монотонным часам, а FrameSynchronizer подбирает кадры, ближайшие
+    по времени, для сохранения синхронных наборов.
+    """
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Анализ яркости нити (все камеры)")
+        self.showFullScreen()
+
+        self.available_cameras = get_available_cameras()
+        if not self.available_cameras:
+            raise Exception("No cameras found")
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        main_layout = QVBoxLayout(central)
+
+        panels_layout = QHBoxLayout()
+        camera_indices = list(range(len(self.available_cameras)))
+        self.synchronizer = FrameSynchronizer(camera_indices)
+        self.panels = []
+        for i, camera_name in enumerate(self.available_cameras):
+            panel = CameraPanel(i, camera_name, time.monotonic, self.synchronizer)
+            panels_layout.addWidget(panel)
+            self.panels.append(panel)
+        main_layout.addLayout(panels_layout)
+
+        help_label = QLabel("Колесико мыши для масштабирования, ЛКМ для выделения области, ПКМ для перемещения")
+        help_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(help_label)
+
+        self.save_all_button = QPushButton("Сохранить синхронные изображения")
+        self.save_all_button.clicked.connect(self.save_synchronized_images)
+        main_layout.addWidget(self.save_all_button)
+
+        self.status_bar = self.statusBar()
+
+        # Периодически показываем расхождение времени между камерами
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(self.update_sync_status)
+        self.sync_timer.start(500)
+
+        for panel in self.panels:
+            panel.video_thread.start()
+
+    def update_sync_status(self):
+        """Показывает расхождение меток времени сопоставленных кадров"""
+        if self.status_bar is None:
+            return
+        matched = self.synchronizer.match(copy=False)
+        if matched is None:
+            self.status_bar.showMessage("Нет синхронных кадров")
+            return
+        skew = FrameSynchronizer.skew(matched)
+        self.status_bar.showMessage(f"Расхождение кадров между камерами: {skew * 1000:.1f} мс")
+
+    def save_synchronized_images(self):
+        """Сохраняет ближайшие по времени кадры всех камер с одним базовым именем"""
+        matched = self.synchronizer.match()
+        if matched is None:
+            if self.status_bar is not None:
+                self.status_bar.showMessage("Нет синхронных кадров для сохранения", 5000)
+            return
+
+        timestamp = datetime.now().strftime(r"%Y-%m-%d_%H-%M-%S")
+        directory = "images"
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        default_name = os.path.join(directory, f"image_{timestamp}")
+
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Задайте базовое имя файла", default_name,
+            "Все файлы (*)"
+        )
+        if not filename:
+            return
+
+        # Усредненный ROI сохраняется тот, что был вычислен на сопоставленном кадре
+        for index, (frame_time, frame, average_roi) in matched.items():
+            Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).save(f"{filename}_cam{index}_orig.png")
+            if average_roi is not None:
+                Image.fromarray(cv2.cvtColor(
+                    average_roi, cv2.COLOR_BGR2RGB
+                )).save(f"{filename}_cam{index}_av_roi.png")
+
+        with open(f"{filename}_timestamps.csv", "w") as f:
+            f.write("camera,timestamp\n")
+            for index, (frame_time, *_) in matched.items():
+                f.write(f"{index},{frame_time:.6f}\n")
+
+        if self.status_bar is not None:
+            self.status_bar.showMessage(f"Синхронные изображения сохранены с базовым именем {filename}", 5000)
+
+    def keyPressEvent(self, a0):
+        if a0 is None:
+            return
+        if a0.key() == Qt.Key.Key_Escape:
+            self.close()
+
+    def closeEvent(self, a0):
+        if a0 is None:
+            return
+        self.sync_timer.stop()
+        for panel in self.panels:
+            panel.video_thread.stop()
         a0.accept()